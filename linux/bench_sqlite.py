@@ -0,0 +1,96 @@
+"""sqlite_profile 基准：对比默认连接参数与调优后的单事务提交延迟
+
+用法：python bench_sqlite.py [rss.db 路径] [事务数]
+在数据库副本上测试，不修改原文件；未指定路径或文件不存在时生成一个含 20 万条记录的模拟库。
+每个事务写入一条待发送消息并提交，与采集时逐条入库的写法一致。
+"""
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import sqlite_profile
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pending_messages (
+        feed_group TEXT, feed_url TEXT, entry_id TEXT, content_hash TEXT,
+        title TEXT, translated_title TEXT, link TEXT, summary TEXT,
+        entry_timestamp REAL, sent INTEGER DEFAULT 0, feed_title TEXT,
+        PRIMARY KEY (feed_group, feed_url, entry_id)
+    )
+"""
+
+
+def build_sample(path, rows=200_000):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO pending_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+        (
+            (f"group{i % 8}", f"https://rsshub.app/feed/{i % 300}", f"entry-{i}", f"{i:032x}",
+             f"标题 {i}", None, f"https://example.com/{i}", "摘要" * 40, now - i, "Feed")
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(conn, transactions):
+    conn.execute(SCHEMA)
+    conn.commit()
+    latencies = []
+    for i in range(transactions):
+        start = time.perf_counter()
+        conn.execute(
+            "INSERT OR IGNORE INTO pending_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)",
+            ("bench", "https://example.com/feed", f"bench-{i}-{time.time_ns()}", "", "title",
+             None, "https://example.com", "", time.time(), "Bench")
+        )
+        conn.commit()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<10} 平均 {statistics.mean(latencies) * 1000:7.3f} ms  "
+          f"中位 {statistics.median(latencies) * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms")
+    return statistics.mean(latencies)
+
+
+def main():
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent / "rss.db"
+    transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        sample = workdir / "sample.db"
+        if source.exists():
+            shutil.copy(source, sample)
+            print(f"数据库：{source}（{source.stat().st_size / 1024 / 1024:.1f} MB）")
+        else:
+            build_sample(sample)
+            print(f"数据库：模拟库（{sample.stat().st_size / 1024 / 1024:.1f} MB）")
+        shutil.copy(sample, workdir / "default.db")
+        shutil.copy(sample, workdir / "tuned.db")
+
+        conn = sqlite3.connect(workdir / "default.db")
+        conn.execute("PRAGMA journal_mode=DELETE")  # 副本可能已是 WAL，按默认回滚日志测试
+        base = report("默认", run(conn, transactions))
+        conn.close()
+
+        conn = sqlite_profile.connect(workdir / "tuned.db")
+        tuned = report("调优", run(conn, transactions))
+        sqlite_profile.close(conn)
+        print(f"提交延迟降低 {base / tuned:.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""rss_store 基准：逐条去重写入与按源批量去重写入的耗时对比
+
+用法：python bench_store.py [源数] [每源条目数]
+每个源一半条目已记录过；分别在 SQLite（临时库）和 MemoryStore 上运行两种写法：
+- 逐条：每条单独 filter_new() 查询，新条目逐条 save_status()；
+- 批量：每源一次 filter_new()，新条目一次 record_entries()。
+MemoryStore 的耗时是去掉数据库后的下限；两种存储的去重结果必须一致。
+"""
+import asyncio
+import hashlib
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import rss_store
+
+GROUP = "bench"
+
+
+def sha(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def build_feeds(feed_count, per_feed):
+    """[(feed_url, [(entry_id, content_hash), ...]), ...]，偶数条目为已记录条目"""
+    return [
+        (f"https://example.com/feed/{f}", [(sha(f"{f}-{i}"), sha(f"content-{f}-{i}")) for i in range(per_feed)])
+        for f in range(feed_count)
+    ]
+
+
+async def seed(store, feeds):
+    now = time.time()
+    for feed_url, candidates in feeds:
+        await store.record_entries(GROUP, feed_url, [
+            (entry_id, content_hash, now) for entry_id, content_hash in candidates[::2]
+        ])
+
+
+async def per_entry(store, feeds):
+    new = []
+    for feed_url, candidates in feeds:
+        for entry_id, content_hash in candidates:
+            if not await store.filter_new(GROUP, feed_url, [(entry_id, content_hash)]):
+                continue
+            await store.save_status(GROUP, feed_url, entry_id, content_hash, time.time())
+            new.append((feed_url, entry_id))
+    return new
+
+
+async def batched(store, feeds):
+    new = []
+    for feed_url, candidates in feeds:
+        unseen = await store.filter_new(GROUP, feed_url, candidates)
+        now = time.time()
+        await store.record_entries(GROUP, feed_url, [(entry_id, content_hash, now) for entry_id, content_hash in unseen])
+        new.extend((feed_url, entry_id) for entry_id, _ in unseen)
+    return new
+
+
+async def run(name, make_store, feeds):
+    results = {}
+    for label, method in (("逐条", per_entry), ("批量", batched)):
+        store = make_store()
+        await store.open()
+        try:
+            await store.ensure_initialized()
+            await seed(store, feeds)
+            start = time.perf_counter()
+            new = await method(store, feeds)
+            elapsed = time.perf_counter() - start
+        finally:
+            await store.close()
+        results[label] = (elapsed, sorted(new))
+        print(f"{name:<8} {label}  {elapsed * 1000:9.1f} ms  新条目 {len(new)}")
+    print(f"{name:<8} 批量提速 {results['逐条'][0] / results['批量'][0]:.1f}x")
+    return results
+
+
+def main():
+    feed_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    per_feed = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    feeds = build_feeds(feed_count, per_feed)
+    print(f"{feed_count} 个源 × {per_feed} 条，一半已记录")
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        counter = iter(range(1_000_000))
+        sqlite = asyncio.run(run(
+            "SQLite", lambda: rss_store.SQLStore(rss_store.SQLiteEngine(workdir / f"bench{next(counter)}.db")), feeds
+        ))
+        memory = asyncio.run(run("Memory", rss_store.MemoryStore, feeds))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    expected = sqlite["批量"][1]
+    for results in (sqlite, memory):
+        for _, new in results.values():
+            assert new == expected, "两种存储 / 写法的去重结果不一致"
+    print("去重结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""textnorm 基准：对比原先逐条 re.sub 的 remove_html_tags 与 textnorm.clean_text
+
+用法：python bench_textnorm.py [轮数]
+每个标题按实际流程清洗 3 次（采集 / 翻译 / 生成消息）。
+"""
+import re
+import sys
+import timeit
+
+import textnorm
+
+# 取自各订阅源的真实标题样式（BBC / NHK / 36氪 / 同花顺 / Telegram 频道转发等）
+TITLES = [
+    "Israel strikes Gaza as ceasefire talks stall",
+    "Trump says US will 'take over' Gaza Strip",
+    "Why Japan's rice prices have doubled in a year",
+    "Ukraine war: Kyiv hit by largest drone attack of the war",
+    "日本政府、来年度予算案を閣議決定　過去最大の115兆円",
+    "石破首相 “関税措置 引き続き見直し求める”",
+    "36氪首发｜「某某科技」完成数亿元B轮融资，加速具身智能落地",
+    "【财经早餐】央行：保持流动性合理充裕",
+    "【 】美股三大指数集体收涨，纳指涨1.2%",
+    "#快讯# 国家统计局：10月CPI同比上涨0.3%",
+    "#突发 #中东局势 以色列对黎巴嫩南部发动空袭 @zaobaosg",
+    "竹新社：台风“康妮”登陆台湾 #天气 #台风",
+    "<b>Breaking:</b> Fed holds rates steady, signals two cuts in 2025",
+    "<p>OpenAI releases new model</p> <a href=\"https://example.com\">link</a>",
+    "阮一峰的网络日志：科技爱好者周刊（第 320 期）：AI 编程的现状",
+    "少数派：我的 2024 年度数字生活清单",
+    "虎嗅：一家老字号的数字化转型 ： 困境与突围",
+    "V2EX › 有没有推荐的 NAS 方案？",
+    "中央社：賴清德出席國慶大會 發表談話",
+    "Sputnik: Russia and China hold joint naval drills in Sea of Japan",
+    "FT中文网：全球央行为何加速购金",
+    "纽约时报中文网：AI热潮下的能源之争",
+    "Al Jazeera: Sudan's war displaces millions as famine spreads",
+    "Stocks rally as inflation cools more than expected",
+    "iPhone 17 Pro review: the best camera Apple has ever made",
+    "同花顺：沪指午间收涨0.56%，半导体板块领涨",
+    "A股收评：三大指数震荡分化 # 创业板指跌0.3%",
+    "＃热点＃ 华为发布会定档 @HuaweiMobile",
+    "What we know about the Los Angeles wildfires",
+    "GitHub Trending: rust-lang/rust gains 2k stars this week",
+]
+
+
+def legacy_remove_html_tags(text):
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'#([^#\s]+)#', r'\1', text)
+    text = re.sub(r'#\w+', '', text)
+    text = re.sub(r'@[^\s]+', '', text).strip()
+    text = re.sub(r'【\s*】', '', text)
+    text = re.sub(r'(?<!\S)#(?!\S)', '', text)
+    text = re.sub(r'(?<!\S)：(?!\S)', '', text)
+    return text
+
+
+def run(func):
+    for title in TITLES:
+        for _ in range(3):
+            func(title)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for title in TITLES:
+        assert textnorm.clean_text(title) == legacy_remove_html_tags(title), title
+        assert textnorm.clean_text.__wrapped__(title) == legacy_remove_html_tags(title), title
+
+    uncached = textnorm.clean_text.__wrapped__
+    results = {
+        "legacy re.sub": timeit.timeit(lambda: run(legacy_remove_html_tags), number=rounds),
+        "textnorm (uncached)": timeit.timeit(lambda: run(uncached), number=rounds),
+        "textnorm (cached)": timeit.timeit(lambda: run(textnorm.clean_text), number=rounds),
+    }
+    calls = rounds * len(TITLES) * 3
+    base = results["legacy re.sub"]
+    for name, seconds in results.items():
+        print(f"{name:<22} {seconds * 1e9 / calls:8.0f} ns/次  {base / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
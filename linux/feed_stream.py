@@ -0,0 +1,80 @@
+"""RSS / Atom 增量解析
+
+基于 xml.etree.ElementTree.XMLPullParser，边接收响应边产出条目，
+调用方确认遇到一串已处理过的条目后即可停止读取，不必下载和解析整个源。
+每个条目解析完成后连同所在的根元素 / channel 一起交给 feedparser 解析，
+字段（含 HTML 清理、实体解码、日期解析）与整体解析完全一致，
+流式路径和 feedparser 回退路径算出的内容哈希相同。
+"""
+import xml.etree.ElementTree as ET
+from feedparser import FeedParserDict, parse
+
+ParseError = ET.ParseError
+
+_FEED_CONTAINERS = ("channel", "feed")
+_ENTRY_TAGS = ("item", "entry")
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _text(elem):
+    """取元素文本；Atom type="xhtml" 内容为子元素，拼接全部文本"""
+    if len(elem):
+        return ''.join(elem.itertext()).strip()
+    return (elem.text or '').strip()
+
+
+def _build_entry(elem, ancestors):
+    """按原文档的根元素 / channel 包装单个条目后交给 feedparser，返回解析出的条目"""
+    wrapper = parent = None
+    for ancestor in ancestors:
+        node = ET.Element(ancestor.tag, ancestor.attrib)
+        if parent is None:
+            wrapper = node
+        else:
+            parent.append(node)
+        parent = node
+    if parent is None:
+        wrapper = elem
+    else:
+        parent.append(elem)
+    entries = parse(ET.tostring(wrapper)).entries
+    return entries[0] if entries else FeedParserDict()
+
+
+class FeedStreamParser:
+    """逐块喂入响应数据，返回本次解析完成的条目"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack = []     # 当前打开的元素
+        self.feed = FeedParserDict()
+
+    def feed_bytes(self, data):
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self):
+        """数据读完后调用，返回剩余条目；文档不完整时抛出 ParseError"""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        entries = []
+        for event, elem in self._parser.read_events():
+            name = _local(elem.tag)
+            if event == "start":
+                self._stack.append(elem)
+                continue
+            self._stack.pop()
+            if name in _ENTRY_TAGS:
+                entries.append(_build_entry(elem, self._stack))
+                elem.clear()  # 条目处理完即释放子元素，内存只与单个条目相关
+            elif name == "title" and self._stack and _local(self._stack[-1].tag) in _FEED_CONTAINERS:
+                self.feed.setdefault("title", _text(elem))
+        return entries
+
+    def result(self, entries):
+        return FeedParserDict(feed=self.feed, entries=entries, bozo=0)
@@ -0,0 +1,106 @@
+"""基于 Unicode 文字区块的语言判断
+
+rss.py / sql_rss.py 的翻译判断和 qq.py 的翻译方向共用：
+- 导入时建好 BMP 码位 → 文字类别的查找表，逐字符查表计数，结果确定；
+- 汉字按 HAN_WEIGHT 加权（一个汉字的信息量约等于几个拉丁字母），
+  假名至少 KANA_MIN 个时汉字计入日文；没有假名的纯汉字标题（如“東京株式市場 日経平均株価”）
+  按日文新字形（経、価 等）的个数和占比判断；
+- 只有拉丁字母为主、带变音字母（é、ü、ñ 等，纯 ASCII 视为英文）、
+  且调用方需要区分具体语言时才懒加载 langdetect。
+"""
+from functools import lru_cache
+
+HAN_WEIGHT = 3          # 汉字相对拉丁字母的权重
+DOMINANT_RATIO = 0.4    # 主导文字占比阈值，低于此值返回 'other'
+KANA_MIN = 2            # 至少出现多少个假名才按日文处理（避免“我の家”这类中文标题）
+KANJI_MIN = 2           # 没有足够假名时，日文新字形至少出现多少个才按日文处理
+KANJI_RATIO = 0.1       # 且日文新字形在全部汉字中的占比不低于该值
+
+_OTHER, _HAN, _KANA, _HANGUL, _CYRILLIC, _ARABIC, _THAI, _LATIN, _LATIN_EXT, _KANJI = range(10)
+_LANG = {_HAN: 'zh', _HANGUL: 'ko', _CYRILLIC: 'ru', _ARABIC: 'ar', _THAI: 'th', _LATIN: 'en'}
+
+_TABLE = bytearray(0x10000)
+for _script, _ranges in (
+    (_HAN, ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF))),
+    (_KANA, ((0x3040, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9F))),
+    (_HANGUL, ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF))),
+    (_CYRILLIC, ((0x0400, 0x04FF),)),
+    (_ARABIC, ((0x0600, 0x06FF),)),
+    (_THAI, ((0x0E00, 0x0E7F),)),
+    (_LATIN, ((0x41, 0x5A), (0x61, 0x7A))),
+    (_LATIN_EXT, ((0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x24F))),
+):
+    for _start, _end in _ranges:
+        _TABLE[_start:_end + 1] = bytes([_script]) * (_end - _start + 1)
+_TABLE[0x30FB] = _TABLE[0x30FC] = _OTHER  # 中点 / 长音符号中日文都会用到
+
+
+# 日文新字形：Shift_JIS 能编码、GB2312 / Big5 / Big5-HKSCS / CP950 都不能编码的汉字，
+# 再去掉港台仍在用的旧字形（爲、僞、愼、飮 等）；按该规则离线生成，避免导入时逐字试编码
+_KANJI_CHARS = (
+    "丗乕乗乢亊亜亰仏仭伜価侭値倶倹偐偸儖兎児冐冦冩凖処凧凩凪刄刔剏剣剤剰労勧勲匂卆単"
+    "厳収叺呉呑呟哘唖啌喞営噛嚔嚠嚢囎団囲図圏圦圧圷圸垉垰垳埓埖塁塰増墸墹壊壌壗壥壱壷"
+    "変夐夛奨妛娯嫐嬢嬶宍寉対専尭屶岻岼岾峅峠峺嵜嵳嵶嶌嶐巌巓巣巻帯帰幇幤庁廃弉弐弖弾"
+    "彁従徳徴応忰怺悋悩悪愡懴戝戦戯戸戻払抜択拝拠拡挙挧挿捜掲掵掻揺摂撃撹擶攅斎旙昿晩"
+    "暁暃暦曵曽朷杁杣杤枡枦枩査桙桜桟梍梺梼検椡椢椣椦椨楽楾榁槇様槝槞樒樢権樮樶橲橸檪"
+    "櫁欟歓歩歳殱殻毎毟気汢浄涙涜渇済渉渋渓満溂溌漑潅澑焔焼煕熕燗爼犠狛猟猯獣珱璢産甼"
+    "畄畉畩畳疂疉痩癨皀皃皹砕砿硲硴碵磆礇秡稲穂穏穐穣竍竒竕竡竰竸笂笶筺箆箚箟篭篶簓簔"
+    "簗籏籘粂粋粐粛粫粭糀糘糺絋経絵絶継続綛緑緕縁縄縅縦繊繋繍繝繦纃纉纐羂翆聟聨聴肬脳"
+    "腟膤膸臓舎舗舮艝艪苅茣荘莟莵菷萢萪蒄蓙蔵薫薬蘓蘰蚫蛍蝋蝿蟇蟐蠎袰裃裄褄褝覚観訳説"
+    "読謡譛譱譲谺豼貎貮賎赱踈躙躱躾軅軆軈軣軽輌轌迯逎逓逧逹遅邉郷酔醗醤醸釈釛釡釼鈩鈬"
+    "鉱銭鋭録錺錻鎹鏥鐚鑁鑓鑚閇閊閲闘陥陦険隠隲隷雑雫霊靤靫靹鞆鞐頚頬頼頽顔顕颪餝駆駈"
+    "駲騒験騨髄髞髪鮖鮴鯑鯒鯣鯲鯵鰄鰮鰰鱇鱚鱶鳫鳬鳰鴎鴪鴫鴬鵆鵈鵤鵺鶏鷆鹸麹麺黒黙鼡龝"
+)
+for _char in _KANJI_CHARS:
+    _TABLE[ord(_char)] = _KANJI
+
+
+def script_counts(text):
+    """各文字类别的字符数，下标为 _HAN / _KANA / ... 常量"""
+    counts = [0] * 10
+    table = _TABLE
+    for char in text:
+        code = ord(char)
+        if code < 0x10000:
+            counts[table[code]] += 1
+        else:
+            counts[_HAN] += 0x20000 <= code <= 0x323AF  # 扩展区汉字
+    return counts
+
+
+@lru_cache(maxsize=4096)
+def detect_language(text, latin_fallback=False):
+    """返回 'zh' / 'ja' / 'ko' / 'ru' / 'ar' / 'th' / 'en'，混杂时 'other'，没有文字时 'unknown'
+
+    latin_fallback=True 时，拉丁字母为主且带变音字母的文本交给 langdetect 区分具体语言（如 'fr'）。
+    """
+    if not text or not isinstance(text, str):
+        return 'unknown'
+    counts = script_counts(text)
+    scores = {lang: counts[script] for script, lang in _LANG.items()}
+    han = counts[_HAN] + counts[_KANJI]
+    scores['zh'] = han * HAN_WEIGHT
+    scores['en'] += counts[_LATIN_EXT]
+    if counts[_KANA] >= KANA_MIN or (counts[_KANJI] >= KANJI_MIN and counts[_KANJI] >= han * KANJI_RATIO):
+        scores['ja'] = counts[_KANA] + scores.pop('zh')
+    total = sum(scores.values())
+    if not total:
+        return 'unknown'
+    lang = max(scores, key=scores.get)
+    if scores[lang] / total <= DOMINANT_RATIO:
+        return 'other'
+    if lang == 'en' and latin_fallback and counts[_LATIN_EXT]:
+        return _latin_language(text)
+    return lang
+
+
+def _latin_language(text):
+    try:
+        from langdetect import DetectorFactory, detect, LangDetectException
+    except ImportError:
+        return 'en'
+    DetectorFactory.seed = 0  # 固定随机种子，结果可复现
+    try:
+        return detect(text)
+    except LangDetectException:
+        return 'en'
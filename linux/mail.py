@@ -11,10 +11,8 @@ from dotenv import load_dotenv
 from email.utils import parseaddr
 from md2tgmd import escape
 import logging
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+import tmt_service
+import textnorm
 import fitz
 
 load_dotenv()
@@ -40,8 +38,7 @@ logger = logging.getLogger(__name__)
 
 def remove_html_tags(text):
     """移除HTML标签"""
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
+    return textnorm.strip_tags(text)
 
 def translate_content_sync(text):
     """同步翻译文本为中文，支持长文本分段翻译"""
@@ -52,12 +49,12 @@ def translate_content_sync(text):
         logger.warning("缺少腾讯云翻译密钥，跳过翻译")
         return text
     
+    def translate(segment):
+        return tmt_service.translate_text(
+            TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY, TENCENT_REGION, segment
+        )
+
     try:
-        cred = credential.Credential(TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY)
-        http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
-        client_profile = ClientProfile(httpProfile=http_profile)
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, client_profile)
-        
         cleaned_text = remove_html_tags(text)
         
         # 检查长度，如果超过限制则分段翻译
@@ -66,13 +63,7 @@ def translate_content_sync(text):
         
         if len(text_bytes) <= MAX_BYTES:
             # 短文本直接翻译
-            req = models.TextTranslateRequest()
-            req.SourceText = cleaned_text
-            req.Source = "auto"
-            req.Target = "zh"
-            req.ProjectId = 0
-            resp = client.TextTranslate(req)
-            return resp.TargetText
+            return translate(cleaned_text)
         else:
             # 长文本分段翻译
             logger.info("检测到长文本，开始分段翻译...")
@@ -90,13 +81,7 @@ def translate_content_sync(text):
                 if len(new_segment_bytes) > MAX_BYTES:
                     # 当前段落会超出限制，先翻译已积累的内容
                     if current_segment:
-                        req = models.TextTranslateRequest()
-                        req.SourceText = current_segment
-                        req.Source = "auto"
-                        req.Target = "zh"
-                        req.ProjectId = 0
-                        resp = client.TextTranslate(req)
-                        segments.append(resp.TargetText)
+                        segments.append(translate(current_segment))
                     
                     # 如果单个段落就超过限制，单独处理
                     if len(para_bytes) > MAX_BYTES:
@@ -110,13 +95,7 @@ def translate_content_sync(text):
                             temp_bytes = (temp_segment + sentence_with_punct).encode('utf-8')
                             
                             if len(temp_bytes) > MAX_BYTES and temp_segment:
-                                req = models.TextTranslateRequest()
-                                req.SourceText = temp_segment
-                                req.Source = "auto"
-                                req.Target = "zh"
-                                req.ProjectId = 0
-                                resp = client.TextTranslate(req)
-                                segments.append(resp.TargetText)
+                                segments.append(translate(temp_segment))
                                 temp_segment = sentence_with_punct
                             else:
                                 temp_segment += sentence_with_punct
@@ -132,13 +111,7 @@ def translate_content_sync(text):
             
             # 翻译最后一段
             if current_segment:
-                req = models.TextTranslateRequest()
-                req.SourceText = current_segment
-                req.Source = "auto"
-                req.Target = "zh"
-                req.ProjectId = 0
-                resp = client.TextTranslate(req)
-                segments.append(resp.TargetText)
+                segments.append(translate(current_segment))
             
             return "\n\n".join(segments)
             
@@ -148,9 +121,8 @@ def translate_content_sync(text):
 
 async def translate_content_async(text):
     """异步翻译文本为中文"""
-    loop = asyncio.get_running_loop()
     try:
-        return await loop.run_in_executor(None, translate_content_sync, text)
+        return await tmt_service.run_sync(translate_content_sync, text)
     except Exception as e:
         logger.error(f"异步翻译失败: {e}")
         return text
@@ -1,17 +1,14 @@
 import os
-import re
 import asyncio
 from datetime import datetime
 from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from telegram import Update
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
 import aiosqlite
 import logging
+import tmt_service
+import lang_detect
 
 # 日志配置
 logging.basicConfig(
@@ -110,27 +107,9 @@ class AsyncTranslationCache:
 
 cache = AsyncTranslationCache()
 
-def detect_language(text: str) -> str:
-    if not text or not isinstance(text, str):
-        return 'unknown'
-    clean_text = re.sub(r'[^\w\u4e00-\u9fff]', '', text, flags=re.UNICODE)
-    if not clean_text:
-        return 'unknown'
-    char_stats = {
-        'zh': len(re.findall(r'[\u4e00-\u9fff]', clean_text)),
-        'ja': len(re.findall(r'[\u3040-\u30ff\u31f0-\u31ff]', clean_text)),
-        'ko': len(re.findall(r'[\uac00-\ud7af\u1100-\u11ff]', clean_text)),
-        'ru': len(re.findall(r'[\u0400-\u04FF]', clean_text)),
-        'en': len(re.findall(r'[a-zA-Z]', clean_text)),
-    }
-    dominant_lang, dominant_ratio = max(
-        ((lang, count / len(clean_text)) for lang, count in char_stats.items()),
-        key=lambda x: x[1]
-    )
-    return dominant_lang if dominant_ratio > 0.4 else 'other'
-
 def get_translation_direction(text: str) -> Tuple[str, str]:
-    lang = detect_language(text)
+    # 拉丁字母文本带变音字母时细分具体语言，非英文的交给接口自动识别
+    lang = lang_detect.detect_language(text, latin_fallback=True)
     # 可扩展多语种支持
     if lang == 'zh':
         return ('zh', 'en')
@@ -146,39 +125,20 @@ def get_translation_direction(text: str) -> Tuple[str, str]:
         return ('auto', 'zh')
 
 class TencentTranslator:
-    def __init__(self):
-        cred = credential.Credential(
-            config.TENCENT_SECRET_ID,
-            config.TENCENT_SECRET_KEY
-        )
-        http_profile = HttpProfile()
-        http_profile.reqMethod = "POST"
-        http_profile.reqTimeout = 30
-        client_profile = ClientProfile()
-        client_profile.httpProfile = http_profile
-        client_profile.signMethod = "TC3-HMAC-SHA256"
-        self.client = tmt_client.TmtClient(
-            cred, 
-            config.TENCENT_REGION, 
-            client_profile
-        )
-
     async def translate(self, text: str, source_lang: str, target_lang: str, max_retries: int = 3) -> str:
-        # 用线程池防止阻塞主事件循环
-        loop = asyncio.get_running_loop()
+        # 共享的 TmtClient 在翻译专用线程池中调用，防止阻塞主事件循环
         last_error = None
         for attempt in range(1, max_retries + 1):
             try:
-                def call_api():
-                    req = models.TextTranslateRequest()
-                    req.SourceText = text
-                    req.Source = source_lang
-                    req.Target = target_lang
-                    req.ProjectId = config.TENCENT_PROJECT_ID
-                    resp = self.client.TextTranslate(req)
-                    return resp.TargetText
-                result = await loop.run_in_executor(None, call_api)
-                return result
+                return await tmt_service.translate_text_async(
+                    config.TENCENT_SECRET_ID,
+                    config.TENCENT_SECRET_KEY,
+                    config.TENCENT_REGION,
+                    text,
+                    source_lang,
+                    target_lang,
+                    config.TENCENT_PROJECT_ID
+                )
             except Exception as e:
                 last_error = e
                 logger.error(f"Tencent translate error: {e}")
@@ -8,27 +8,37 @@ import pytz
 import fcntl
 import time
 import signal
-import aiosqlite
 import sys
+import statistics
+import socket
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from feedparser import parse
 from telegram import Bot
-from telegram.error import BadRequest
+from telegram.request import HTTPXRequest
+from telegram.error import BadRequest, RetryAfter
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+try:
+    import brotli  # noqa: F401  aiohttp 需要 Brotli 才能解码 br
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+import tmt_service
+import textnorm
+import rss_store
+import lang_detect
+import feed_stream
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
-from collections import defaultdict
-from langdetect import detect, LangDetectException
+from collections import defaultdict, OrderedDict
 
 # ========== 全局退出标志 ==========
 SHOULD_EXIT = False
+EXIT_EVENT = asyncio.Event()  # 常驻模式下用于唤醒等待中的定时任务
 # ========== 环境加载 ==========
 load_dotenv()
 # 设置时区（在cron环境中很重要）
@@ -55,7 +65,40 @@ TENCENTCLOUD_SECRET_KEY = os.getenv("TENCENTCLOUD_SECRET_KEY")
 TENCENT_REGION = os.getenv("TENCENT_REGION", "na-siliconvalley")
 TENCENT_SECRET_ID = os.getenv("TENCENT_SECRET_ID")
 TENCENT_SECRET_KEY = os.getenv("TENCENT_SECRET_KEY")
-semaphore = asyncio.Semaphore(2)
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))     # 全局同时抓取数
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))           # 同一主机同时抓取数
+FETCH_HOST_DELAY = float(os.getenv("FETCH_HOST_DELAY", "1"))     # 同一主机两次请求最小间隔（秒）
+TRANSLATION_LRU_SIZE = int(os.getenv("TRANSLATION_LRU_SIZE", "2048"))  # 进程内翻译缓存条数
+WORKER_BUDGET = int(os.getenv("WORKER_BUDGET", "12"))  # 全局同时进行的抓取 / 翻译 / 发送操作数
+TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", "1"))                 # 私聊每秒消息数
+TG_GROUP_CHAT_PER_MIN = float(os.getenv("TG_GROUP_CHAT_PER_MIN", "20"))  # 群组/频道每分钟消息数
+TG_CHAT_BURST = float(os.getenv("TG_CHAT_BURST", "3"))               # 单个会话允许的突发条数
+TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "30"))            # 单个 Bot 每秒消息数
+TG_POOL_SIZE = int(os.getenv("TG_POOL_SIZE", "8"))                   # 每个 Bot 到 api.telegram.org 的连接池大小
+TG_POOL_TIMEOUT = float(os.getenv("TG_POOL_TIMEOUT", "10"))          # 等待空闲连接的超时（秒）
+SEND_RETRY_INTERVAL = float(os.getenv("SEND_RETRY_INTERVAL", "60"))   # 常驻模式重投队列中发送失败消息的间隔（秒）
+SEND_RETRY_AFTER_MAX = int(os.getenv("SEND_RETRY_AFTER_MAX", "3"))    # 单条消息遇到 RetryAfter 的最多重发次数，超过后留在队列
+PG_NOTIFY_FLUSH = os.getenv("PG_NOTIFY_FLUSH", "0") == "1"           # PG 下常驻模式改由 LISTEN/NOTIFY 触发批量推送
+PG_LISTEN_RETRY = float(os.getenv("PG_LISTEN_RETRY", "10"))          # LISTEN 连接断开后的重连间隔（秒）
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))   # 增量解析每次读取字节数
+STREAM_KNOWN_RUN = int(os.getenv("STREAM_KNOWN_RUN", "3"))         # 连续遇到多少条已处理条目后停止解析
+POLL_MAX_FACTOR = float(os.getenv("POLL_MAX_FACTOR", "8"))       # 未配置 poll_max 时，最长轮询间隔 = interval × 该倍数
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "1.5"))            # 连续无新条目时轮询间隔的放大倍数
+POLL_CADENCE_SAMPLES = int(os.getenv("POLL_CADENCE_SAMPLES", "10"))  # 估算发布频率所用的最近条目数
+HEALTH_FAILURE_THRESHOLD = int(os.getenv("HEALTH_FAILURE_THRESHOLD", "3"))   # 连续失败多少次后熔断
+HEALTH_BASE_COOLDOWN = float(os.getenv("HEALTH_BASE_COOLDOWN", "600"))       # 首次熔断冷却时间（秒），之后每次失败翻倍
+HEALTH_MAX_COOLDOWN = float(os.getenv("HEALTH_MAX_COOLDOWN", "86400"))       # 冷却时间上限（秒）
+MIRROR_EWMA_ALPHA = float(os.getenv("MIRROR_EWMA_ALPHA", "0.3"))      # 镜像延迟/错误率滑动平均权重
+MIRROR_FAIL_PENALTY = float(os.getenv("MIRROR_FAIL_PENALTY", "30"))   # 评分时一次失败折算的耗时（秒）
+MIRROR_HEDGE_DELAY = float(os.getenv("MIRROR_HEDGE_DELAY", "0"))      # >0 时最优镜像超过该秒数未返回即并发请求次优镜像，0 关闭
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "32"))                       # 连接池总连接数
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "4"))      # 同一主机最大连接数
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "600"))                  # DNS 缓存时间（秒）
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))             # 空闲连接保活时间（秒）
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")) # 建立连接超时（秒）
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))       # 两次读取数据之间的超时（秒）
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))     # 单次请求总超时（秒）
+HTTP_MAX_BODY = int(os.getenv("HTTP_MAX_BODY", str(10 * 1024 * 1024)))  # 订阅源响应体（解压后）大小上限
 BACKUP_DOMAINS_STR = os.getenv("BACKUP_DOMAINS", "")
 BACKUP_DOMAINS = [domain.strip() for domain in BACKUP_DOMAINS_STR.split(",") if domain.strip()]
 
@@ -122,6 +165,8 @@ RSS_GROUPS = [ # RSS 组配置列表
         ],
         "group_key": "FOURTH_RSS_FEEDS",
         "interval": 700,       # 10分钟 
+        "poll_min": 300,       # 发布频繁的源最短 5 分钟轮询一次（可选，默认等于 interval）
+        "poll_max": 3590,      # 冷门源最长 1 小时轮询一次（可选，默认 interval × POLL_MAX_FACTOR）
         "batch_send_interval": 1790,   # 批量推送
         "history_days": 3,     # 新增，保留3天
         "bot_token": os.getenv("RSS_LINDA"),   # Telegram Bot Token
@@ -155,6 +200,7 @@ RSS_GROUPS = [ # RSS 组配置列表
         "interval": 1790,       # 30分钟
         "batch_send_interval": 35990,   # 批量推送
         "history_days": 300,     # 新增，保留3天
+        "stream_parse": True,    # 增量解析：遇到一串已处理条目即停止读取（大体量归档源）
         "bot_token": os.getenv("TONGHUASHUN_RSS"),  #   Telegram Bot Token
         "processor": {
             "translate": False,     #翻译开关
@@ -412,6 +458,12 @@ RSS_GROUPS = [ # RSS 组配置列表
     }
 ]
 
+# 翻译缓存保留天数：取开启翻译的组中最长的 history_days
+TRANSLATION_CACHE_DAYS = max(
+    (group.get("history_days", 30) for group in RSS_GROUPS if group["processor"].get("translate")),
+    default=30
+)
+
 # ========== 数据库配置 ==========
 PG_URL = os.getenv("PG_URL")
 USE_PG = PG_URL is not None
@@ -428,352 +480,357 @@ else:
 
 if USE_PG:
     import asyncpg
-class RSSDatabase:
-    def __init__(self, loop=None):
-        self.loop = loop or asyncio.get_event_loop()
-        self.conn = None
-        self.pg_pool = None
 
-    async def open(self):
-        if USE_PG:
-            self.pg_pool = await asyncpg.create_pool(PG_URL)
+def create_http_session():
+    """创建 RSS 抓取共用的 ClientSession
+
+    连接池按主机复用 keep-alive 连接并缓存 DNS，rsshub / feedburner 等同主机的大量订阅源
+    共用少量连接；超时拆分为连接 / 读取 / 总时长，显式声明支持的压缩格式。
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=HTTP_TOTAL_TIMEOUT,
+        connect=HTTP_CONNECT_TIMEOUT,
+        sock_read=HTTP_READ_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+    )
+
+async def read_limited(response, max_bytes=HTTP_MAX_BODY):
+    """读取响应体，超过 max_bytes（按解压后大小）时抛出 ValueError"""
+    if response.content_length and response.content_length > max_bytes:
+        raise ValueError(f"响应体过大: {response.content_length} > {max_bytes}")
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ValueError(f"响应体超过 {max_bytes} 字节")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+class FetchLimiter:
+    """抓取限流：全局并发上限 + 按主机的并发数和请求间隔"""
+    def __init__(self, total, per_host, host_delay):
+        self.total = asyncio.Semaphore(total)
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self._host_semaphores = {}
+        self._host_last_start = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.per_host)
+        async with host_semaphore:
+            # 先占用本次的开始时间，保证同主机请求之间至少间隔 host_delay
+            now = time.monotonic()
+            start = max(now, self._host_last_start.get(host, 0) + self.host_delay)
+            self._host_last_start[host] = start
+            if start > now:
+                await asyncio.sleep(start - now)
+            async with self.total:
+                yield
+
+fetch_limiter = FetchLimiter(FETCH_CONCURRENCY, FETCH_PER_HOST, FETCH_HOST_DELAY)
+# 全局工作预算：只包住单次抓取 / 翻译 / 发送等叶子操作，不可嵌套获取
+worker_budget = asyncio.Semaphore(WORKER_BUDGET)
+
+class TranslationCache:
+    """两级翻译缓存：进程内有界 LRU + 数据库 translation_cache 表
+
+    键为规范化文本（合并空白）的 SHA-256 和目标语言，db 在连接数据库后绑定。
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.db = None
+        self._lru = OrderedDict()
+
+    @staticmethod
+    def make_key(text, target_lang):
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest(), target_lang
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    async def get(self, text, target_lang="zh"):
+        key = self.make_key(text, target_lang)
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        if not self.db:
+            return None
+        try:
+            value = await self.db.get_translation(*key)
+        except Exception as e:
+            logger.warning(f"读取翻译缓存失败: {e}")
+            return None
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    async def set(self, text, translated_text, target_lang="zh"):
+        key = self.make_key(text, target_lang)
+        self._remember(key, translated_text)
+        if not self.db:
+            return
+        try:
+            await self.db.save_translation(*key, translated_text)
+        except Exception as e:
+            logger.warning(f"写入翻译缓存失败: {e}")
+
+translation_cache = TranslationCache(TRANSLATION_LRU_SIZE)
+
+class MirrorSelector:
+    """RSSHub 镜像选择：按域名维护延迟和错误率的滑动平均，持久化到 mirror_stats 表
+
+    评分为预期耗时 (1 - 错误率) × 延迟 + 错误率 × MIRROR_FAIL_PENALTY，越小越优先；
+    没有记录的镜像评分为 0，会先被尝试一次。db 在连接数据库后绑定，首次排序时加载。
+    """
+    def __init__(self, alpha, fail_penalty):
+        self.alpha = alpha
+        self.fail_penalty = fail_penalty
+        self.db = None
+        self._stats = {}
+        self._loaded = False
+
+    def score(self, domain):
+        stat = self._stats.get(domain)
+        if not stat:
+            return 0
+        return (1 - stat["error_rate"]) * stat["latency"] + stat["error_rate"] * self.fail_penalty
+
+    async def order(self, domains):
+        if not self._loaded and self.db:
+            self._loaded = True
+            try:
+                self._stats.update(await self.db.load_mirror_stats())
+            except Exception as e:
+                logger.warning(f"读取镜像统计失败: {e}")
+        # sorted 稳定，评分相同时保持配置顺序
+        return sorted(domains, key=self.score)
+
+    async def record(self, domain, ok, latency):
+        stat = self._stats.get(domain)
+        if stat is None:
+            stat = self._stats[domain] = {"latency": latency, "error_rate": 0.0 if ok else 1.0}
         else:
-            self.conn = await aiosqlite.connect(DATABASE_FILE)
+            if ok:
+                stat["latency"] = self.alpha * latency + (1 - self.alpha) * stat["latency"]
+            stat["error_rate"] = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * stat["error_rate"]
+        if not self.db:
+            return
+        try:
+            await self.db.save_mirror_stat(domain, stat["latency"], stat["error_rate"])
+        except Exception as e:
+            logger.warning(f"写入镜像统计失败: {e}")
+
+mirror_selector = MirrorSelector(MIRROR_EWMA_ALPHA, MIRROR_FAIL_PENALTY)
 
-    async def close(self):
-        if USE_PG and self.pg_pool:
-            await self.pg_pool.close()
-        elif self.conn:
-            await self.conn.close()
+PENDING_NOTIFY_CHANNEL = "pending_messages"  # 新增待发送消息时 NOTIFY 的频道，payload 为组名
 
-    async def ensure_initialized(self):
-        """确保数据库表已创建"""
-        await self.create_tables()
+class RSSDatabase(rss_store.SQLStore):
+    """rss.py 的状态存储：条目状态、时间戳、待发送消息和发送队列沿用 SQLStore 的实现，
+    另有校验信息、翻译缓存、轮询计划、源健康和镜像统计等表"""
 
-    async def create_tables(self):  # 这里缩进修复
+    def __init__(self, loop=None):
+        super().__init__(rss_store.create_engine(PG_URL, DATABASE_FILE))
+
+    async def create_tables(self):
         """改进的建表语句，确保 PostgreSQL 和 SQLite 索引一致"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 主表
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    );
-                """)
-                # 确保内容哈希索引存在
-                await conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time DOUBLE PRECISION
-                    );
-                """)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp REAL,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    )""")
-                await c.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
+        await super().create_tables()
+        if self.engine.dialect == "pg" and not await self.engine.fetchval(
+            "SELECT 1 FROM pg_trigger WHERE tgname='pending_messages_notify' AND tgrelid='pending_messages'::regclass"
+        ):
+            # 新增待发送消息时通知批量推送进程（同一事务内相同组名只通知一次）；
+            # 只在缺少时创建，避免每次启动都对 pending_messages 加表锁
+            async with self.engine.transaction() as db:
+                await db.execute(f"""
+                    CREATE OR REPLACE FUNCTION notify_pending_message() RETURNS trigger AS $$
+                    BEGIN
+                        PERFORM pg_notify('{PENDING_NOTIFY_CHANNEL}', NEW.feed_group);
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql;
                 """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp REAL,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    )
+                # 多个进程同时启动时只有一个能建成，其余忽略重复
+                await db.execute("""
+                    DO $$ BEGIN
+                        CREATE TRIGGER pending_messages_notify
+                        AFTER INSERT ON pending_messages
+                        FOR EACH ROW WHEN (NEW.sent = 0)
+                        EXECUTE FUNCTION notify_pending_message();
+                    EXCEPTION WHEN duplicate_object THEN NULL;
+                    END $$;
                 """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time REAL
-                    )
-                """)
-                await self.conn.commit()
-
-    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10)
-                ON CONFLICT DO NOTHING
-                """, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR IGNORE INTO pending_messages
-                    (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                """, (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title))
-                await self.conn.commit()
-
-    async def get_pending_messages(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=$1 AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, feed_group)
-                return [dict(row) for row in rows]
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=? AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, (feed_group,))
-                keys = [d[0] for d in c.description]
-                rows = await c.fetchall()
-                return [dict(zip(keys, row)) for row in rows]
-
-    async def mark_pending_as_sent(self, feed_group, ids):
-        if not ids:
-            return
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=$1 AND entry_id=$2
-                """, [(feed_group, eid) for eid in ids])
-        else:
-            async with self.conn.cursor() as c:
-                await c.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=? AND entry_id=?
-                """, [(feed_group, eid) for eid in ids])
-                await self.conn.commit()
-
-    async def get_last_batch_sent_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1
-                """, feed_group)
-                return row['last_batch_sent_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?
-                """, (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_batch_sent_time(self, feed_group, ts):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO batch_timestamps (feed_group, last_batch_sent_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
-                """, feed_group, ts)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time)
-                    VALUES (?, ?)
-                """, (feed_group, ts))
-                await self.conn.commit()
-
-    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
-        """改进的状态保存，确保去重一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 使用 ON CONFLICT 确保唯一性
-                await conn.execute("""
-                    INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) 
-                    VALUES($1, $2, $3, $4, $5) 
-                    ON CONFLICT (feed_group, feed_url, entry_url) 
-                    DO UPDATE SET 
-                        entry_content_hash = EXCLUDED.entry_content_hash,
-                        entry_timestamp = EXCLUDED.entry_timestamp
-                """, feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "INSERT OR REPLACE INTO rss_status VALUES (?, ?, ?, ?, ?)",
-                    (feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-                )
-                await self.conn.commit()
-
-    async def has_content_hash(self, feed_group, content_hash):
-        """改进的内容哈希检查，确保编码一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 修复：PostgreSQL 参数占位符错误，应该是 $1, $2
-                row = await conn.fetchrow(
-                    "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
-                    feed_group, content_hash
-                )
-                return row is not None
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
-                    (feed_group, content_hash)
-                )
-                return await c.fetchone() is not None
-
-    async def load_status(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for row in rows:
-                    feed_url, entry_url = row['feed_url'], row['entry_url']
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT feed_url, entry_url FROM rss_status")
-                rows = await c.fetchall()
-                status = {}
-                for feed_url, entry_url in rows:
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-
-    async def load_last_run_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
-                return row['last_run_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_run_time(self, feed_group, last_run_time):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO timestamps (feed_group, last_run_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
-                """, feed_group, last_run_time)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                    VALUES (?, ?)
-                """, (feed_group, last_run_time))
-                await self.conn.commit()
-
-    async def cleanup_history(self, days, feed_group):
-        now = time.time()
-        cutoff_ts = now - days * 86400
-
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
-                )
-                last_cleanup = row['last_cleanup_time'] if row else 0
-                if now - last_cleanup < 86400:
-                    return
-                await conn.execute(
-                    "DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2",
-                    feed_group, cutoff_ts
-                )
-                await conn.execute("""
-                    INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES ($1, $2)
-                    ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
-                """, feed_group, now)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?",
-                    (feed_group,)
-                )
-                result = await c.fetchone()
-                last_cleanup = result[0] if result else 0
-                if now - last_cleanup < 86400:
-                    return
-                await c.execute(
-                    "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                    (feed_group, cutoff_ts)
-                )
-                await c.execute("""
-                    INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES (?, ?)
-                """, (feed_group, now))
-                await self.conn.commit()
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS feed_validators (
+                feed_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_digest TEXT,
+                updated_time DOUBLE PRECISION
+            )
+        """)
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                text_hash TEXT,
+                target_lang TEXT,
+                translated_text TEXT,
+                created_time DOUBLE PRECISION,
+                PRIMARY KEY (text_hash, target_lang)
+            )
+        """)
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS feed_schedule (
+                feed_group TEXT,
+                feed_url TEXT,
+                next_poll DOUBLE PRECISION,
+                poll_interval DOUBLE PRECISION,
+                cadence DOUBLE PRECISION,
+                misses INTEGER DEFAULT 0,
+                PRIMARY KEY (feed_group, feed_url)
+            )
+        """)
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS feed_health (
+                feed_url TEXT PRIMARY KEY,
+                failures INTEGER DEFAULT 0,
+                last_status INTEGER,
+                latency DOUBLE PRECISION,
+                last_success DOUBLE PRECISION,
+                last_error TEXT,
+                open_until DOUBLE PRECISION DEFAULT 0,
+                updated_time DOUBLE PRECISION
+            )
+        """)
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS mirror_stats (
+                domain TEXT PRIMARY KEY,
+                latency DOUBLE PRECISION,
+                error_rate DOUBLE PRECISION,
+                updated_time DOUBLE PRECISION
+            )
+        """)
+
+    def split_text(self, text):
+        """发送队列按 Telegram 单条消息长度上限分段"""
+        return split_message(text)
+
+    async def get_feed_validator(self, feed_url):
+        """读取条件请求校验信息（ETag / Last-Modified / 内容摘要）"""
+        return await self.engine.fetchrow("""
+            SELECT etag, last_modified, body_digest FROM feed_validators WHERE feed_url=$1
+        """, feed_url)
+
+    async def save_feed_validator(self, feed_url, etag, last_modified, body_digest):
+        await self.engine.execute("""
+            INSERT INTO feed_validators (feed_url, etag, last_modified, body_digest, updated_time)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (feed_url) DO UPDATE SET
+                etag=EXCLUDED.etag,
+                last_modified=EXCLUDED.last_modified,
+                body_digest=EXCLUDED.body_digest,
+                updated_time=EXCLUDED.updated_time
+        """, feed_url, etag, last_modified, body_digest, time.time())
+
+    async def load_feed_schedule(self, feed_group):
+        """读取组内各源的轮询计划 {feed_url: {...}}"""
+        rows = await self.engine.fetch("""
+            SELECT feed_url, next_poll, poll_interval, cadence, misses FROM feed_schedule WHERE feed_group=$1
+        """, feed_group)
+        return {row.pop("feed_url"): row for row in rows}
+
+    async def save_feed_schedule(self, feed_group, feed_url, next_poll, poll_interval, cadence, misses):
+        await self.engine.execute("""
+            INSERT INTO feed_schedule (feed_group, feed_url, next_poll, poll_interval, cadence, misses)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (feed_group, feed_url) DO UPDATE SET
+                next_poll=EXCLUDED.next_poll,
+                poll_interval=EXCLUDED.poll_interval,
+                cadence=EXCLUDED.cadence,
+                misses=EXCLUDED.misses
+        """, feed_group, feed_url, next_poll, poll_interval, cadence, misses)
+
+    FEED_HEALTH_COLUMNS = ("feed_url", "failures", "last_status", "latency", "last_success", "last_error", "open_until", "updated_time")
+
+    async def get_feed_health(self, feed_url):
+        return await self.engine.fetchrow(
+            f"SELECT {', '.join(self.FEED_HEALTH_COLUMNS)} FROM feed_health WHERE feed_url=$1", feed_url
+        )
+
+    async def list_feed_health(self):
+        """全部源的健康状态，失败次数多的在前"""
+        return await self.engine.fetch(
+            f"SELECT {', '.join(self.FEED_HEALTH_COLUMNS)} FROM feed_health ORDER BY failures DESC, feed_url"
+        )
+
+    async def save_feed_health(self, feed_url, failures, last_status, latency, last_success, last_error, open_until):
+        await self.engine.execute("""
+            INSERT INTO feed_health (feed_url, failures, last_status, latency, last_success, last_error, open_until, updated_time)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            ON CONFLICT (feed_url) DO UPDATE SET
+                failures=EXCLUDED.failures,
+                last_status=EXCLUDED.last_status,
+                latency=EXCLUDED.latency,
+                last_success=EXCLUDED.last_success,
+                last_error=EXCLUDED.last_error,
+                open_until=EXCLUDED.open_until,
+                updated_time=EXCLUDED.updated_time
+        """, feed_url, failures, last_status, latency, last_success, last_error, open_until, time.time())
+
+    async def load_mirror_stats(self):
+        """读取全部镜像统计 {domain: {"latency", "error_rate"}}"""
+        rows = await self.engine.fetch("SELECT domain, latency, error_rate FROM mirror_stats")
+        return {row.pop("domain"): row for row in rows}
+
+    async def save_mirror_stat(self, domain, latency, error_rate):
+        await self.engine.execute("""
+            INSERT INTO mirror_stats (domain, latency, error_rate, updated_time)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (domain) DO UPDATE SET
+                latency=EXCLUDED.latency,
+                error_rate=EXCLUDED.error_rate,
+                updated_time=EXCLUDED.updated_time
+        """, domain, latency, error_rate, time.time())
+
+    async def get_translation(self, text_hash, target_lang):
+        return await self.engine.fetchval("""
+            SELECT translated_text FROM translation_cache WHERE text_hash=$1 AND target_lang=$2
+        """, text_hash, target_lang)
+
+    async def save_translation(self, text_hash, target_lang, translated_text):
+        await self.engine.execute("""
+            INSERT INTO translation_cache (text_hash, target_lang, translated_text, created_time)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (text_hash, target_lang) DO UPDATE SET
+                translated_text=EXCLUDED.translated_text,
+                created_time=EXCLUDED.created_time
+        """, text_hash, target_lang, translated_text, time.time())
+
+    async def cleanup_translation_cache(self, days):
+        """按天数淘汰翻译缓存，与 cleanup_history 一样每天最多执行一次"""
+        async def delete(db, now):
+            await db.execute("DELETE FROM translation_cache WHERE created_time<$1", now - days * 86400)
+        await self.run_cleanup("__translation_cache__", delete)
 
 # ========== 业务逻辑 ==========
 
 def remove_html_tags(text):
-    text = re.sub(r'<[^>]+>', '', text)
-    text = re.sub(r'#([^#\s]+)#', r'\1', text)
-    text = re.sub(r'#\w+', '', text)
-    text = re.sub(r'@[^\s]+', '', text).strip()
-    text = re.sub(r'【\s*】', '', text)
-    text = re.sub(r'(?<!\S)#(?!\S)', '', text)
-    text = re.sub(r'(?<!\S)：(?!\S)', '', text)
-    return text
+    return textnorm.clean_text(text)
 
 def get_entry_identifier(entry):
     if hasattr(entry, 'guid') and entry.guid:
@@ -818,6 +875,61 @@ def signal_handler(signum, frame):
     logger.warning(f"收到信号 {signum}，正在优雅退出...")
     SHOULD_EXIT = True
 
+def request_exit():
+    """常驻模式的信号回调：设置退出标志并唤醒所有定时器"""
+    global SHOULD_EXIT
+    logger.warning("收到退出信号，常驻模式正在停止...")
+    SHOULD_EXIT = True
+    EXIT_EVENT.set()
+
+async def wait_or_exit(delay):
+    """等待 delay 秒，收到退出信号时提前返回"""
+    try:
+        await asyncio.wait_for(EXIT_EVENT.wait(), timeout=max(delay, 0))
+    except asyncio.TimeoutError:
+        pass
+
+class BotRegistry:
+    """同一进程内每个 token 只创建一个 Bot
+
+    多个组共用同一 token（RSS_TWO、RSS_LINDA 等）时共享 Bot 及其 HTTP 连接池；
+    Bot 首次使用时 initialize 一次，退出时由 cleanup_resources 统一 shutdown。
+    """
+    def __init__(self, pool_size, pool_timeout):
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._bots = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, bot_token):
+        bot = self._bots.get(bot_token)
+        if bot is not None:
+            return bot
+        async with self._lock:
+            bot = self._bots.get(bot_token)
+            if bot is None:
+                request = HTTPXRequest(
+                    connection_pool_size=self.pool_size,
+                    pool_timeout=self.pool_timeout,
+                    read_timeout=10,
+                    write_timeout=10,
+                )
+                bot = Bot(token=bot_token, request=request)
+                await bot.initialize()
+                self._bots[bot_token] = bot
+        return bot
+
+    async def shutdown(self):
+        bots = list(self._bots.values())
+        self._bots.clear()
+        for bot in bots:
+            try:
+                await bot.shutdown()
+            except Exception as e:
+                logger.error(f"关闭 Bot 失败: {e}")
+
+bot_registry = BotRegistry(TG_POOL_SIZE, TG_POOL_TIMEOUT)
+
 def get_entry_timestamp(entry):
     dt = datetime.now(pytz.UTC)
     if hasattr(entry, 'published_parsed') and entry.published_parsed:
@@ -828,48 +940,333 @@ def get_entry_timestamp(entry):
         dt = datetime(*entry.updated_parsed[:6], tzinfo=pytz.utc)
     return dt
 
-@retry(
-    stop=stop_after_attempt(1),
-    wait=wait_exponential(multiplier=1, min=5, max=30),
-    retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
-)
-async def send_single_message(bot, chat_id, text, disable_web_page_preview=False):
-    try:
-        MAX_MESSAGE_LENGTH = 4096
-        text_chunks = []
-        current_chunk = []
-        current_length = 0
-        paragraphs = text.split('\n\n')
-        for para in paragraphs:
-            para_length = len(para)  # 字符长度
-            if current_length + para_length + 2 > MAX_MESSAGE_LENGTH:
-                text_chunks.append('\n\n'.join(current_chunk))
-                current_chunk = []
-                current_length = 0
-            current_chunk.append(para)
-            current_length += para_length + 2
-        if current_chunk:
+def poll_tick(group):
+    """组的调度粒度：配置了 poll_min 时按 poll_min 唤醒，由各源的轮询计划决定是否抓取"""
+    return group.get("poll_min", group["interval"])
+
+def entry_cadence(entries):
+    """最近 POLL_CADENCE_SAMPLES 条带发布时间条目的间隔中位数（秒），样本不足时返回 None"""
+    stamps = sorted(
+        (get_entry_timestamp(entry).timestamp() for entry in entries
+         if getattr(entry, 'published_parsed', None) or getattr(entry, 'updated_parsed', None)),
+        reverse=True
+    )[:POLL_CADENCE_SAMPLES]
+    gaps = [newer - older for newer, older in zip(stamps, stamps[1:]) if newer > older]
+    return statistics.median(gaps) if gaps else None
+
+async def update_feed_schedule(db, group, feed_url, previous, entries, hit, now):
+    """按发布频率和本次是否有新条目计算下次轮询时间
+
+    目标间隔为发布间隔中位数的一半，限制在 [poll_min, poll_max] 内；
+    有新条目时直接采用目标间隔，没有时在上次间隔基础上按 POLL_BACKOFF 放大。
+    """
+    poll_min = poll_tick(group)
+    poll_max = group.get("poll_max", group["interval"] * POLL_MAX_FACTOR)
+    cadence = entry_cadence(entries) if entries else None
+    if cadence is None and previous:
+        cadence = previous["cadence"]
+    target = cadence / 2 if cadence else group["interval"]
+    target = min(max(target, poll_min), poll_max)
+    if hit or not previous:
+        interval = target
+        misses = 0
+    else:
+        interval = min(max(target, previous["poll_interval"] * POLL_BACKOFF), poll_max)
+        misses = previous["misses"] + 1
+    await db.save_feed_schedule(group["group_key"], feed_url, now + interval, interval, cadence, misses)
+
+def split_message(text, max_length=4096):
+    """按段落把消息切分为不超过 Telegram 长度限制的片段"""
+    text_chunks = []
+    current_chunk = []
+    current_length = 0
+    for para in text.split('\n\n'):
+        para_length = len(para)  # 字符长度
+        if current_chunk and current_length + para_length + 2 > max_length:
             text_chunks.append('\n\n'.join(current_chunk))
-        for chunk in text_chunks:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=chunk,
-                parse_mode='MarkdownV2',
-                disable_web_page_preview=disable_web_page_preview,
-                read_timeout=10,
-                write_timeout=10
-            )
-    except BadRequest as e:
-        logger.error(f"消息发送失败(Markdown错误): {e} - 文本片段: {chunk[:200]}...")  # 修复这里
+            current_chunk = []
+            current_length = 0
+        current_chunk.append(para)
+        current_length += para_length + 2
+    if current_chunk:
+        text_chunks.append('\n\n'.join(current_chunk))
+    return text_chunks
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为允许的突发条数"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def block(self, seconds):
+        """收到 RetryAfter 后清空令牌，seconds 秒内不再放行"""
+        self._tokens = 0
+        self._updated = max(self._updated, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._updated:
+                    await asyncio.sleep(self._updated - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class SendQueue:
+    """Telegram 发送队列：消息先持久化到 send_queue 表，再按组顺序投递
+
+    每个 (token, chat) 和每个 token 各有一个令牌桶，群组/频道（chat_id 以 - 开头）
+    按每分钟 TG_GROUP_CHAT_PER_MIN 条限速；RetryAfter 按返回的秒数暂停该会话后重发，
+    最多 SEND_RETRY_AFTER_MAX 次，之后（或收到退出信号时）消息留在队列由下次投递。
+    消息先按批认领（owner + 租约），发送成功后立即从队列删除；进程中断时
+    最多重复最后一条，其余已认领消息在租约过期后由下次运行或其他实例接手。
+    """
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._chat_buckets = {}
+        self._bot_buckets = {}
+        self._locks = defaultdict(asyncio.Lock)
+
+    def _chat_bucket(self, bot_token, chat_id):
+        key = (bot_token, chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            rate = TG_GROUP_CHAT_PER_MIN / 60 if chat_id.startswith("-") else TG_CHAT_RATE
+            bucket = self._chat_buckets[key] = TokenBucket(rate, TG_CHAT_BURST)
+        return bucket
+
+    def _bot_bucket(self, bot_token):
+        bucket = self._bot_buckets.get(bot_token)
+        if bucket is None:
+            bucket = self._bot_buckets[bot_token] = TokenBucket(TG_GLOBAL_RATE, TG_GLOBAL_RATE)
+        return bucket
+
+    async def _deliver(self, bot, bot_token, row):
+        """发送一条队列消息；返回 False 表示暂时失败，保留在队列中下次重试"""
+        chat_bucket = self._chat_bucket(bot_token, row["chat_id"])
+        bot_bucket = self._bot_bucket(bot_token)
+        for attempt in range(SEND_RETRY_AFTER_MAX + 1):
+            if SHOULD_EXIT:
+                return False
+            await chat_bucket.acquire()
+            await bot_bucket.acquire()
+            try:
+                async with worker_budget:
+                    await bot.send_message(
+                        chat_id=row["chat_id"],
+                        text=row["text"],
+                        parse_mode='MarkdownV2',
+                        disable_web_page_preview=bool(row["disable_preview"]),
+                        read_timeout=10,
+                        write_timeout=10
+                    )
+                return True
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                logger.warning(f"⏳ Telegram 限流，{delay}秒后重发 [{row['chat_id']}]")
+                chat_bucket.block(delay)
+                if attempt == SEND_RETRY_AFTER_MAX:
+                    break
+                # 限流等待可被退出信号打断
+                await wait_or_exit(delay)
+            except BadRequest as e:
+                logger.error(f"消息发送失败(Markdown错误): {e} - 文本片段: {row['text'][:200]}...")
+                return True
+            except Exception as e:
+                logger.error(f"❌ 发送消息失败 [{row['chat_id']}]: {e}")
+                return False
+        logger.warning(f"⏳ Telegram 持续限流，消息留在队列稍后重试 [{row['chat_id']}]")
+        return False
+
+    async def drain(self, db, group):
+        """按入队顺序投递组内队列消息，遇到暂时失败时停止，剩余消息留待下次"""
+        group_key = group["group_key"]
+        bot_token = group["bot_token"]
+        async with self._locks[group_key]:
+            while not SHOULD_EXIT:
+                rows = await db.claim_queued_messages(group_key, self.owner)
+                if not rows:
+                    return
+                try:
+                    bot = await bot_registry.get(bot_token)
+                    for row in rows:
+                        if SHOULD_EXIT or not await self._deliver(bot, bot_token, row):
+                            return
+                        await db.delete_queued_message(row["id"], self.owner)
+                except Exception as e:
+                    logger.error(f"❌ 投递队列消息失败 [{group_key}]: {e}")
+                    return
+                finally:
+                    # 本批未发送完的消息交还队列
+                    await db.release_queued_messages(group_key, self.owner)
+
+    async def retry_loop(self, db, group):
+        """常驻模式：启动时及之后每 SEND_RETRY_INTERVAL 秒，队列中有消息（上次中断或暂时发送失败留下的）就投递
+
+        不必等到该组下一次批量推送或下一条新条目。
+        """
+        while not SHOULD_EXIT:
+            try:
+                if await db.has_queued_messages(group["group_key"]):
+                    await self.drain(db, group)
+            except Exception as e:
+                logger.error(f"发送队列投递失败 [{group['group_key']}]: {e}")
+            await wait_or_exit(SEND_RETRY_INTERVAL)
+
+send_queue = SendQueue()
+
+async def read_feed_stream(response, canonical_url, is_known):
+    """增量读取并解析响应，连续 STREAM_KNOWN_RUN 条已处理条目后停止读取
+
+    订阅源按新到旧排列，遇到一串已处理条目说明后面都是旧内容，
+    剩余数据不再下载和解析。XML 解析失败时读完剩余数据交给 feedparser。
+    """
+    parser = feed_stream.FeedStreamParser()
+    raw = []
+    size = 0
+    entries = []
+    known_run = 0
+    try:
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            if size > HTTP_MAX_BODY:
+                raise ValueError(f"响应体超过 {HTTP_MAX_BODY} 字节")
+            raw.append(chunk)
+            batch = parser.feed_bytes(chunk)
+            if not batch:
+                continue
+            entries.extend(batch)
+            for known in await is_known(canonical_url, batch):
+                known_run = known_run + 1 if known else 0
+            if known_run >= STREAM_KNOWN_RUN:
+                return parser.result(entries)
+        entries.extend(parser.close())
+        return parser.result(entries)
+    except feed_stream.ParseError as e:
+        logger.warning(f"增量解析失败，改用 feedparser {canonical_url}: {e}")
+        raw.append(await read_limited(response))
+        body = b"".join(raw)
+        if len(body) > HTTP_MAX_BODY:
+            raise ValueError(f"响应体超过 {HTTP_MAX_BODY} 字节")
+        return parse(body)
+
+_HALF_OPEN_PROBES = set()  # 冷却结束后正在探测的源，同一时间只放行一个请求
+
+def feed_breaker_allows(feed_url, health, now):
+    """熔断检查：冷却中跳过；冷却结束后进入半开状态，只放行一次探测"""
+    if not health or not health["open_until"]:
+        return True
+    if health["open_until"] > now or feed_url in _HALF_OPEN_PROBES:
+        return False
+    _HALF_OPEN_PROBES.add(feed_url)
+    return True
+
+async def record_feed_health(db, feed_url, health, ok, status, error, latency):
+    """记录本次抓取结果；连续失败达到阈值后熔断，冷却时间按失败次数指数增长"""
+    if ok:
+        if health and health["open_until"]:
+            logger.info(f"✅ 订阅源恢复 [{feed_url}]")
+        await db.save_feed_health(feed_url, 0, status, latency, time.time(), None, 0)
+        return
+    failures = (health["failures"] if health else 0) + 1
+    last_success = health["last_success"] if health else None
+    open_until = 0
+    if failures >= HEALTH_FAILURE_THRESHOLD:
+        exponent = min(failures - HEALTH_FAILURE_THRESHOLD, 16)
+        cooldown = min(HEALTH_BASE_COOLDOWN * 2 ** exponent, HEALTH_MAX_COOLDOWN)
+        open_until = time.time() + cooldown
+        logger.warning(f"⚠️ 订阅源熔断 [{feed_url}]: 连续失败 {failures} 次，{cooldown:.0f}秒后重试，最后错误: {error}")
+    await db.save_feed_health(feed_url, failures, status, latency, last_success, error, open_until)
+
+async def fetch_from_domain(session, url, domain, headers, validator, canonical_url, is_known):
+    """向单个域名请求订阅源，返回 (ok, status, error, feed_data, latency)
+
+    304 或内容摘要未变化时 ok 为 True、feed_data 为 None。
+    """
+    started = None
+    status = None
+    try:
+        async with fetch_limiter.slot(domain), worker_budget:
+            started = time.monotonic()
+            async with session.get(url, headers=headers) as response:
+                status = response.status
+                if response.status == 304:
+                    return True, status, None, None, time.monotonic() - started
+                if response.status in (503, 403, 404, 429):
+                    return False, status, f"HTTP {status}", None, time.monotonic() - started
+                response.raise_for_status()
+                if is_known is not None:
+                    feed_data = await read_feed_stream(response, canonical_url, is_known)
+                    feed_data["etag"] = response.headers.get("ETag")
+                    feed_data["modified"] = response.headers.get("Last-Modified")
+                    feed_data["body_digest"] = None
+                    return True, status, None, feed_data, time.monotonic() - started
+                body = await read_limited(response)
+                body_digest = hashlib.sha256(body).hexdigest()
+                if validator and validator.get("body_digest") == body_digest:
+                    return True, status, None, None, time.monotonic() - started
+                feed_data = parse(body)
+                feed_data["etag"] = response.headers.get("ETag")
+                feed_data["modified"] = response.headers.get("Last-Modified")
+                feed_data["body_digest"] = body_digest
+                return True, status, None, feed_data, time.monotonic() - started
+    except aiohttp.ClientResponseError as e:
+        error = f"HTTP {e.status}"
+        status = e.status
     except Exception as e:
-        raise
+    #    logger.error(f"请求失败: {url}, 错误: {e}")
+        error = f"{type(e).__name__}: {e}"
+    return False, status, error, None, (time.monotonic() - started) if started else 0
+
+async def hedged_fetch(attempt, domains):
+    """对冲请求：按顺序尝试 domains，当前请求超过 MIRROR_HEDGE_DELAY 秒未完成时提前请求下一个镜像
+
+    同时最多两个请求在途，先成功者胜出并取消其余请求；全部失败时返回最后一次结果。
+    """
+    remaining = list(domains)
+    tasks = set()
+    outcome = (False, None, None, None, 0)
+    try:
+        while remaining or tasks:
+            if remaining and len(tasks) < 2:
+                tasks.add(asyncio.create_task(attempt(remaining.pop(0))))
+            timeout = MIRROR_HEDGE_DELAY if remaining and len(tasks) < 2 else None
+            done, tasks = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                outcome = task.result()
+                if outcome[0]:
+                    return outcome
+        return outcome
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 @retry(
     stop=stop_after_attempt(1),
     wait=wait_exponential(multiplier=1, min=2, max=10),
     retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
 )
-async def fetch_feed(session, feed_url):
+async def fetch_feed(session, feed_url, db=None, is_known=None):
+    """抓取并解析订阅源
+
+    传入 db 时启用条件请求：带上次保存的 ETag / Last-Modified，
+    304 或内容摘要未变化时直接返回 None（视为无新条目），不调用 feedparser。
+    解析结果上附带 etag / modified / body_digest，由调用方在处理成功后保存。
+    传入 is_known(canonical_url, entries) 时改用增量解析（见 read_feed_stream），
+    不计算内容摘要。
+    传入 db 时同时记录源的健康状态，熔断中的源直接跳过（见 feed_breaker_allows）。
+    rsshub.app 的源按 mirror_selector 评分从优到差尝试各镜像，可选对冲请求（见 hedged_fetch）。
+    """
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36'}
     parsed = urlparse(feed_url)
     is_rsshub = parsed.netloc == "rsshub.app"
@@ -879,49 +1276,125 @@ async def fetch_feed(session, feed_url):
     else:
         try_domains = [parsed.netloc]
         canonical_url = feed_url
-    for domain in try_domains:
-        modified_url = feed_url.replace(parsed.netloc, domain)
+    validator = None
+    health = None
+    if db:
         try:
-            async with semaphore:
-                async with session.get(modified_url, headers=headers, timeout=30) as response:
-                    if response.status in (503, 403, 404, 429):
-                        continue
-                    response.raise_for_status()
-                    return parse(await response.read()), canonical_url
-        except aiohttp.ClientResponseError as e:
-            if e.status in (503, 403, 404, 429):
-                continue
+            health = await db.get_feed_health(canonical_url)
         except Exception as e:
-        #    logger.error(f"请求失败: {modified_url}, 错误: {e}")
-            continue
-   # logger.error(f"所有域名尝试失败: {feed_url}")
-    return None, canonical_url
+            logger.warning(f"读取源健康状态失败 {canonical_url}: {e}")
+        if not feed_breaker_allows(canonical_url, health, time.time()):
+            return None, canonical_url
+        try:
+            validator = await db.get_feed_validator(canonical_url)
+        except Exception as e:
+            logger.warning(f"读取条件请求信息失败 {canonical_url}: {e}")
+    if validator:
+        if validator.get("etag"):
+            headers['If-None-Match'] = validator["etag"]
+        if validator.get("last_modified"):
+            headers['If-Modified-Since'] = validator["last_modified"]
+    domains = await mirror_selector.order(try_domains) if is_rsshub else try_domains
+
+    async def attempt(domain):
+        outcome = await fetch_from_domain(
+            session, feed_url.replace(parsed.netloc, domain), domain, headers, validator, canonical_url, is_known
+        )
+        if is_rsshub:
+            await mirror_selector.record(domain, outcome[0], outcome[4])
+        return outcome
+
+    outcome = (False, None, None, None, 0)
+    try:
+        if is_rsshub and MIRROR_HEDGE_DELAY > 0:
+            outcome = await hedged_fetch(attempt, domains)
+        else:
+            for domain in domains:
+                outcome = await attempt(domain)
+                if outcome[0]:
+                    break
+       # logger.error(f"所有域名尝试失败: {feed_url}")
+        return outcome[3], canonical_url
+    finally:
+        _HALF_OPEN_PROBES.discard(canonical_url)
+        if db:
+            ok, status, error, _, latency = outcome
+            try:
+                await record_feed_health(db, canonical_url, health, ok, status, error, latency)
+            except Exception as e:
+                logger.warning(f"记录源健康状态失败 {canonical_url}: {e}")
 
 async def translate_with_credentials(secret_id, secret_key, text):
-    loop = asyncio.get_running_loop()
-    text_bytes = text.encode('utf-8')
-    if len(text_bytes) > 2000:
-        safe_bytes = text_bytes[:2000]
-        while safe_bytes[-1] & 0xC0 == 0x80:
-            safe_bytes = safe_bytes[:-1]
-        text = safe_bytes.decode('utf-8', errors='ignore')
-     #   logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
+    text = tmt_service.truncate_utf8(text, 2000)
     try:
-        return await loop.run_in_executor(
-            None, 
-            lambda: _sync_translate(secret_id, secret_key, text)
-        )
+        async with worker_budget:
+            return await tmt_service.run_sync(_sync_translate, secret_id, secret_key, text)
     except Exception as e:
     #    logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
         raise
 
-def is_need_translate(text):
+async def translate_and_cache(secret_id, secret_key, text):
+    """调用翻译接口，只缓存接口成功返回的结果"""
+    translated = await translate_with_credentials(secret_id, secret_key, text)
+    await translation_cache.set(text, translated)
+    return translated
+
+async def translate_batch_with_fallback_key(texts):
+    """批量翻译：主密钥失败时尝试备用密钥"""
     try:
-        lang = detect(text)
-        # 只对英文、日文、韩文、阿拉伯文等非中文做翻译
-        return lang not in ("zh-cn", "zh-tw", "zh", "yue")
-    except LangDetectException:
-        return False
+        async with worker_budget:
+            return await tmt_service.translate_batch_async(
+                TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY, TENCENT_REGION, texts
+            )
+    except Exception:
+        if not (TENCENT_SECRET_ID and TENCENT_SECRET_KEY):
+            raise
+        async with worker_budget:
+            return await tmt_service.translate_batch_async(
+                TENCENT_SECRET_ID, TENCENT_SECRET_KEY, TENCENT_REGION, texts
+            )
+
+async def auto_translate_batch(texts):
+    """批量翻译标题，返回与 texts 对应的结果
+
+    先查翻译缓存，未命中的去重后按字节上限分批调用 TextTranslateBatch；
+    整批失败或单条无结果时，仅对这些条目回退到 auto_translate_text 逐条翻译。
+    """
+    results = [None] * len(texts)
+    pending = defaultdict(list)  # 清洗后的文本 -> 原下标列表（同一标题只翻译一次）
+    for index, text in enumerate(texts):
+        cleaned_text = remove_html_tags(text).strip()
+        if len(cleaned_text) <= 3 or is_mostly_symbols(cleaned_text):
+            results[index] = escape(cleaned_text)
+            continue
+        cached = await translation_cache.get(cleaned_text)
+        if cached is not None:
+            results[index] = cached
+            continue
+        pending[cleaned_text].append(index)
+
+    sources = list(pending)
+    truncated = [tmt_service.truncate_utf8(text, 2000) for text in sources]
+    for batch in tmt_service.split_batches(truncated):
+        batch_sources = [sources[i] for i in batch]
+        try:
+            translated = await translate_batch_with_fallback_key([truncated[i] for i in batch])
+        except Exception as e:
+            logger.warning(f"批量翻译失败，改为逐条翻译 ({len(batch_sources)} 条): {e}")
+            translated = []
+        for position, source in enumerate(batch_sources):
+            target = translated[position] if position < len(translated) else None
+            if target:
+                await translation_cache.set(source, target)
+            else:
+                target = await auto_translate_text(source)
+            for index in pending[source]:
+                results[index] = target
+    return results
+
+def is_need_translate(text):
+    # 只对英文、日文、韩文、阿拉伯文等非中文做翻译；没有文字（纯数字/符号）时不翻译
+    return lang_detect.detect_language(text) not in ("zh", "unknown")
     
 def is_mostly_symbols(text):
     """检查文本是否主要由符号、数字组成"""
@@ -937,15 +1410,7 @@ def is_mostly_symbols(text):
 
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        return tmt_service.translate_text(secret_id, secret_key, TENCENT_REGION, remove_html_tags(text))
     except TencentCloudSDKException as e:
         error_details = {
             "code": getattr(e, "code", ""),
@@ -1021,11 +1486,15 @@ async def auto_translate_text(text):
     if len(cleaned_text) <= 3 or is_mostly_symbols(cleaned_text):
       #  logger.debug(f"跳过翻译 - 文本过短或主要为符号: {cleaned_text}")
         return escape(cleaned_text)
+
+    cached = await translation_cache.get(cleaned_text)
+    if cached is not None:
+        return cached
     
     try:
         # 首先尝试主密钥
         try:
-            return await translate_with_credentials(
+            return await translate_and_cache(
                 TENCENTCLOUD_SECRET_ID, 
                 TENCENTCLOUD_SECRET_KEY,
                 cleaned_text
@@ -1043,7 +1512,7 @@ async def auto_translate_text(text):
         if TENCENT_SECRET_ID and TENCENT_SECRET_KEY:
         #    logger.warning("主翻译密钥失败（非语言识别错误），尝试备用密钥...")
             try:
-                return await translate_with_credentials(
+                return await translate_and_cache(
                     TENCENT_SECRET_ID,
                     TENCENT_SECRET_KEY,
                     cleaned_text
@@ -1078,12 +1547,13 @@ async def generate_group_message(feed_data, entries, processor):
         # ✅ 现在可以安全地使用 template_needs_summary
         logger.debug(f"[摘要处理] 组: {source_name}, 需要摘要: {template_needs_summary}")
         
-        for entry in entries:
-            raw_subject = remove_html_tags(entry.title or "无标题")
-            if processor.get("translate", False):
-                translated_subject = await auto_translate_text(raw_subject)
-            else:
-                translated_subject = raw_subject
+        raw_subjects = [remove_html_tags(entry.title or "无标题") for entry in entries]
+        if processor.get("translate", False):
+            translated_subjects = await auto_translate_batch(raw_subjects)
+        else:
+            translated_subjects = raw_subjects
+
+        for entry, translated_subject in zip(entries, translated_subjects):
             safe_subject = escape(translated_subject)
             raw_url = entry.link
             safe_url = escape(raw_url)
@@ -1163,31 +1633,49 @@ async def _format_batch_message(header, messages, processor):
     
     return segments
 
-async def send_batch_messages(bot, chat_id, message_content, disable_web_page_preview=False):
-    """发送批量消息，处理分段"""
-    if isinstance(message_content, list):  # 分段消息
-        for i, segment in enumerate(message_content):
-            if segment.strip():  # 确保段不为空
-                try:
-                    await send_single_message(
-                        bot, chat_id, segment, 
-                        disable_web_page_preview=disable_web_page_preview
-                    )
-                    if i < len(message_content) - 1:  # 不是最后一条
-                        await asyncio.sleep(1)  # 避免发送过快
-                except Exception as e:
-                    logger.error(f"发送分段消息失败: {e}")
-    else:  # 单条消息
-        await send_single_message(
-            bot, chat_id, message_content,
-            disable_web_page_preview=disable_web_page_preview
+async def enqueue_feed_batch(group, db, feed_url, msgs):
+    """把一个订阅源的待发送消息生成批量消息写入发送队列，同一事务内标记为已发送"""
+    group_key = group["group_key"]
+    processor = group["processor"]
+    feed_title = (msgs[0].get("feed_title") or group.get("name") or feed_url)
+    
+    # 创建模拟的feed和entry对象
+    class DummyFeed:
+        feed = {'title': feed_title}
+        
+    class Entry:
+        def __init__(self, row):
+            self.title = row["translated_title"] or row["title"]
+            self.link = row["link"]
+            self.summary = row.get("summary", "") or ""  # ✅ 新增摘要支持
+    entries = [Entry(row) for row in msgs]
+    
+    try:
+        # 生成消息内容
+        feed_message = await generate_group_message(
+            DummyFeed, entries, {**processor, "translate": False}
         )
+        
+        if feed_message:
+            # 消息（支持分段）写入发送队列，同一事务内标记为已发送
+            await db.enqueue_messages(
+                group_key,
+                TELEGRAM_CHAT_ID[0],
+                feed_message,
+                not processor.get("preview", True),
+                sent_entry_ids=[row["entry_id"] for row in msgs],
+                feed_url=feed_url
+            )
+            
+    except rss_store.HandoffConflict:
+        logger.info(f"待发送消息已由其他实例入队，跳过[{group_key}-{feed_url}]")
+    except Exception as e:
+        logger.error(f"批量推送失败[{group_key}-{feed_url}]: {e}")
 
 # 修改批量发送函数中的调用
-async def process_batch_send(group, db: RSSDatabase):
+async def process_batch_send(group, db: RSSDatabase, force=False):
+    """推送该组积压的待发送消息；force=True 时跳过推送间隔检查（调用方已等到推送时刻）"""
     group_key = group["group_key"]
-    bot_token = group["bot_token"]
-    processor = group["processor"]
     batch_interval = group.get("batch_send_interval")
     
     if not batch_interval:
@@ -1195,107 +1683,89 @@ async def process_batch_send(group, db: RSSDatabase):
         
     now = datetime.now(pytz.utc).timestamp()
     last_batch_sent = await db.get_last_batch_sent_time(group_key)
-    if now - last_batch_sent < batch_interval:
+    if not force and now - last_batch_sent < batch_interval:
         return
         
-    pending = await db.get_pending_messages(group_key)
-    if not pending:
-        await db.save_last_batch_sent_time(group_key, now)
-        return
+    # 游标分页读取，同一订阅源的行连续到达，凑齐一个源就生成消息入队
+    feed_url = None
+    msgs = []
+    async for rows in db.iter_pending_messages(group_key):
+        for row in rows:
+            if msgs and row["feed_url"] != feed_url:
+                await enqueue_feed_batch(group, db, feed_url, msgs)
+                msgs = []
+            feed_url = row["feed_url"]
+            msgs.append(row)
+    if msgs:
+        await enqueue_feed_batch(group, db, feed_url, msgs)
 
-    # 按 feed_url 分组消息
-    feed_url_to_msgs = defaultdict(list)
-    for row in pending:
-        feed_url_to_msgs[row["feed_url"]].append(row)
-
-    bot = Bot(token=bot_token)
-    sent_entry_ids = []
-    
-    for feed_url, msgs in feed_url_to_msgs.items():
-        feed_title = (msgs[0].get("feed_title") or group.get("name") or feed_url)
-        
-        # 创建模拟的feed和entry对象
-        class DummyFeed:
-            feed = {'title': feed_title}
-            
-        class Entry:
-            def __init__(self, row):
-                self.title = row["translated_title"] or row["title"]
-                self.link = row["link"]
-                self.summary = row.get("summary", "") or ""  # ✅ 新增摘要支持
-        entries = [Entry(row) for row in msgs]
-        
-        try:
-            # 生成消息内容
-            feed_message = await generate_group_message(
-                DummyFeed, entries, {**processor, "translate": False}
-            )
-            
-            if feed_message:
-                # 发送消息（支持分段）
-                await send_batch_messages(
-                    bot,
-                    TELEGRAM_CHAT_ID[0],
-                    feed_message,
-                    disable_web_page_preview=not processor.get("preview", True)
-                )
-                # 记录已发送的消息ID
-                sent_entry_ids.extend([row["entry_id"] for row in msgs])
-                
-        except Exception as e:
-            logger.error(f"批量推送失败[{group_key}-{feed_url}]: {e}")
-    
-    # 标记已发送的消息
-    if sent_entry_ids:
-        await db.mark_pending_as_sent(group_key, sent_entry_ids)
-    
+    await send_queue.drain(db, group)
     await db.save_last_batch_sent_time(group_key, now)
 
 # ========== 组采集（采集但可选择是否立即推送） ==========
-async def process_group(session, group_config, global_status, db: RSSDatabase):
+async def process_group(session, group_config, db: RSSDatabase):
     """在组处理中添加退出检查"""
-    global SHOULD_EXIT
-    
     if SHOULD_EXIT:
         logger.info("收到退出信号，停止处理组任务")
         return
         
-    group_name = group_config["name"]
     group_key = group_config["group_key"]
     processor = group_config["processor"]
-    bot_token = group_config["bot_token"]
     batch_send_interval = group_config.get("batch_send_interval", None)
     
     try:
         last_run = await db.load_last_run_time(group_key)
         now = datetime.now(pytz.utc).timestamp()
-        if (now - last_run) < group_config["interval"]:
+        tick = poll_tick(group_config)
+        if (now - last_run) < tick:
             return
-            
-        bot = Bot(token=bot_token)
-        for index, feed_url in enumerate(group_config["urls"]):
+
+        # 只抓取到期的源（提前半个调度粒度，避免错过一整轮）
+        schedule = await db.load_feed_schedule(group_key)
+        due_urls = [
+            feed_url for feed_url in group_config["urls"]
+            if feed_url not in schedule or schedule[feed_url]["next_poll"] <= now + tick / 2
+        ]
+
+        async def known_entries(canonical_url, entries):
+            candidates = [(get_entry_identifier(entry), get_entry_content_hash(entry)) for entry in entries]
+            unseen = set(await db.filter_new(group_key, canonical_url, candidates))
+            return [candidate not in unseen for candidate in candidates]
+        is_known = known_entries if group_config.get("stream_parse") else None
+        # 组内各源并发抓取（受 fetch_limiter 全局/按主机限流），再按原顺序去重和发送
+        results = await asyncio.gather(
+            *(fetch_feed(session, feed_url, db, is_known) for feed_url in due_urls),
+            return_exceptions=True
+        )
+        for feed_url, result in zip(due_urls, results):
+            feed_data = None
+            new_entries = []
             try:
-                if index > 0:
-                    await asyncio.sleep(1)
-                    
-                feed_data, canonical_url = await fetch_feed(session, feed_url)
+                if isinstance(result, Exception):
+                    raise result
+                feed_data, canonical_url = result
                 if not feed_data or not feed_data.entries:
                     continue
                     
-                processed_ids = global_status.get(canonical_url, set())
                 new_entries = []
                 seen_in_batch = set()
                 new_hashes_in_batch = set()  # 当前批次的内容哈希去重
 
-                for entry in feed_data.entries:
-                    entry_id = get_entry_identifier(entry)
-                    content_hash = get_entry_content_hash(entry)
-                    
-                    # 统一使用内容哈希去重（主要修复）
-                    if await db.has_content_hash(group_key, content_hash):
+                candidates = [
+                    (entry, get_entry_identifier(entry), get_entry_content_hash(entry))
+                    for entry in feed_data.entries
+                ]
+                # 条目标识 + 内容哈希去重（整源一次查询）
+                unseen = set(await db.filter_new(
+                    group_key, canonical_url,
+                    [(entry_id, content_hash) for _, entry_id, content_hash in candidates]
+                ))
+
+                for entry, entry_id, content_hash in candidates:
+                    if (entry_id, content_hash) not in unseen:
                         continue
                         
-                    if entry_id in processed_ids or entry_id in seen_in_batch:
+                    if entry_id in seen_in_batch:
                         continue
                         
                     # 在当前批次中也用内容哈希去重
@@ -1309,20 +1779,24 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                     seen_in_batch.add(entry_id)
                     new_hashes_in_batch.add(content_hash)
                     new_entries.append((entry, content_hash, entry_id))
-                    
+
+                # 新条目都已写入状态表（或没有新条目）时才记录校验信息
+                recorded = not new_entries
                 if new_entries:
                     if batch_send_interval:
-                        # 批量发送模式：存入待发送队列
-                        for entry, content_hash, entry_id in new_entries:
-                            raw_subject = remove_html_tags(getattr(entry, "title", "") or "")
-                            if processor["translate"] and is_need_translate(raw_subject):
-                                translated_subject = await auto_translate_text(raw_subject)
-                            else:
-                                translated_subject = raw_subject
-                                
-                            await db.add_pending_message(
-                                group_key, 
-                                canonical_url, 
+                        # 批量发送模式：存入待发送队列（整源一个事务）
+                        pending_rows = []
+                        status_rows = []
+                        subjects = [remove_html_tags(getattr(entry, "title", "") or "") for entry, _, _ in new_entries]
+                        if processor["translate"]:
+                            # 整源需要翻译的标题走批量翻译
+                            need_indexes = [i for i, subject in enumerate(subjects) if is_need_translate(subject)]
+                            translated = await auto_translate_batch([subjects[i] for i in need_indexes])
+                            for i, translated_subject in zip(need_indexes, translated):
+                                subjects[i] = translated_subject
+
+                        for (entry, content_hash, entry_id), translated_subject in zip(new_entries, subjects):
+                            pending_rows.append((
                                 entry_id, 
                                 content_hash,
                                 getattr(entry, "title", ""), 
@@ -1331,40 +1805,53 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                                 getattr(entry, "summary", ""),
                                 get_entry_timestamp(entry).timestamp() if get_entry_timestamp(entry) else time.time(),
                                 feed_data.feed.get('title', "") 
-                            )
-                            await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                            processed_ids.add(entry_id)
-                            
-                        global_status[canonical_url] = processed_ids
+                            ))
+                            status_rows.append((entry_id, content_hash, time.time()))
+
+                        await db.record_entries(group_key, canonical_url, status_rows, pending_rows)
+                        recorded = True
                     else:
                         # 立即发送模式
                         feed_message = await generate_group_message(feed_data, [e for e,_,_ in new_entries], processor)
                         if feed_message:
-                            try:
-                                await send_single_message(
-                                    bot,
-                                    TELEGRAM_CHAT_ID[0],
-                                    feed_message,
-                                    disable_web_page_preview=not processor.get("preview", True)
-                                )
-                                for entry, content_hash, entry_id in new_entries:
-                                    await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                    processed_ids.add(entry_id)
-                                global_status[canonical_url] = processed_ids
-                            except Exception as send_error:
-                                logger.error(f"❌ 发送消息失败 [{feed_url}]: {send_error}")
-                                raise
-                                
+                            # 状态和消息同一事务写入，消息由发送队列投递
+                            await db.record_entries(
+                                group_key,
+                                canonical_url,
+                                [(entry_id, content_hash, time.time()) for _, content_hash, entry_id in new_entries],
+                                outbox=(TELEGRAM_CHAT_ID[0], feed_message, not processor.get("preview", True))
+                            )
+                            recorded = True
+                            await send_queue.drain(db, group_config)
+
+                # 本源处理完成后再记录校验信息；失败或新条目未入库（如消息生成为空）时
+                # 不记录，下次仍会重新请求和解析
+                if recorded:
+                    await db.save_feed_validator(
+                        canonical_url,
+                        feed_data.get("etag"),
+                        feed_data.get("modified"),
+                        feed_data.get("body_digest")
+                    )
+
             except Exception as e:
                 logger.error(f"❌ 处理失败 [{feed_url}]: {e}")
+            finally:
+                try:
+                    await update_feed_schedule(
+                        db, group_config, feed_url, schedule.get(feed_url),
+                        feed_data.entries if feed_data else None, bool(new_entries), now
+                    )
+                except Exception as e:
+                    logger.error(f"❌ 更新轮询计划失败 [{feed_url}]: {e}")
                 
         await db.save_last_run_time(group_key, now)
         
     except Exception as e:
         logger.critical(f"‼️ 处理组失败 [{group_key}]: {e}")
 
-async def main():
-    logger.info("🚀 RSS Bot 开始执行")
+async def main(daemon=False):
+    logger.info("🚀 RSS Bot 开始执行" + ("（常驻模式）" if daemon else ""))
     
     # 快速数据库连接检查（60秒超时）
     try:
@@ -1379,6 +1866,10 @@ async def main():
     except Exception as e:
         logger.error(f"❌ 数据库连接失败: {e}，程序退出")
         return
+
+    if daemon:
+        await run_daemon()
+        return
     
     start_time = time.time()
     max_retries = 3
@@ -1398,20 +1889,28 @@ async def main():
                 logger.critical("达到最大重试次数，程序退出")
                 return
 
-async def run_main_logic():
+def acquire_lock():
+    """获取文件锁，失败返回 None"""
     lock_file = None
-    db = RSSDatabase()
-    
     try:
-        # 获取文件锁
         lock_file = open(LOCK_FILE, "w")
         fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
         logger.info("🔒 成功获取文件锁")
+        return lock_file
     except OSError:
         logger.warning("⛔ 无法获取文件锁，已有实例在运行，程序退出")
-        return
     except Exception as e:
         logger.error(f"文件锁异常: {str(e)}")
+    if lock_file:
+        lock_file.close()
+    return None
+
+async def run_main_logic():
+    db = RSSDatabase()
+    
+    # 获取文件锁
+    lock_file = acquire_lock()
+    if not lock_file:
         return
         
     try:
@@ -1421,25 +1920,18 @@ async def run_main_logic():
         await db.ensure_initialized()
         logger.info("✅ 数据库连接成功")
         
-        # 清理历史记录
-        logger.info("🧹 正在清理历史记录...")
-        for group in RSS_GROUPS:
-            days = group.get("history_days", 30)
-            try:
-                await db.cleanup_history(days, group["group_key"])
-            except Exception as e:
-                logger.error(f"清理历史记录异常: 组={group['group_key']}, 错误={e}")
-                
-        # 主处理逻辑
+        translation_cache.db = db
+        mirror_selector.db = db
+        
+        # 主处理逻辑：各组独立流水线（清理 → 采集 → 批量推送），由 worker_budget 统一限流
         logger.info("🚀 开始处理 RSS 订阅...")
-        async with aiohttp.ClientSession() as session:
-            status = await db.load_status()
+        async with create_http_session() as session:
             tasks = []
             
             for group in RSS_GROUPS:
                 try:
                     task = asyncio.create_task(
-                        process_group(session, group, status, db)
+                        run_group_pipeline(session, group, db)
                     )
                     tasks.append(task)
                 except Exception as e:
@@ -1447,15 +1939,6 @@ async def run_main_logic():
             
             if tasks:
                 await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # 批量发送任务
-            batch_tasks = [
-                process_batch_send(group, db) 
-                for group in RSS_GROUPS 
-                if group.get("batch_send_interval")
-            ]
-            if batch_tasks:
-                await asyncio.gather(*batch_tasks, return_exceptions=True)
                 
     except asyncio.CancelledError:
         logger.warning("⏹️ 任务被取消")
@@ -1466,8 +1949,230 @@ async def run_main_logic():
         # 确保资源清理
         await cleanup_resources(db, lock_file)
 
+async def run_group_pipeline(session, group, db):
+    """单组流水线：采集完成后立即批量推送本组，不等待其他组"""
+    try:
+        # 先投递上次中断时留在队列中的消息
+        await send_queue.drain(db, group)
+    except Exception as e:
+        logger.error(f"发送队列投递失败 [{group['group_key']}]: {e}")
+    await cleanup_group_history(db, group)
+    await process_group(session, group, db)
+    if group.get("batch_send_interval"):
+        try:
+            await process_batch_send(group, db)
+        except Exception as e:
+            logger.error(f"批量推送失败 [{group['group_key']}]: {e}")
+
+async def cleanup_group_history(db, group):
+    """清理组的历史记录；开启翻译的组同时淘汰过期翻译缓存"""
+    days = group.get("history_days", 30)
+    try:
+        await db.cleanup_history(days, group["group_key"])
+        if group["processor"].get("translate"):
+            await db.cleanup_translation_cache(TRANSLATION_CACHE_DAYS)
+    except Exception as e:
+        logger.error(f"清理历史记录异常: 组={group['group_key']}, 错误={e}")
+
+async def group_loop(session, group, db):
+    """常驻模式：按组的调度粒度（poll_min / interval）定时采集"""
+    group_key = group["group_key"]
+    interval = poll_tick(group)
+    while not SHOULD_EXIT:
+        cycle_start = time.time()
+        await cleanup_group_history(db, group)
+        await process_group(session, group, db)
+        try:
+            next_run = await db.load_last_run_time(group_key) + interval
+        except Exception as e:
+            logger.error(f"读取运行时间失败 [{group_key}]: {e}")
+            next_run = 0
+        # 本轮失败未更新运行时间时，按本轮开始时间顺延，避免空转
+        if next_run <= time.time():
+            next_run = cycle_start + interval
+        await wait_or_exit(next_run - time.time())
+
+async def batch_loop(group, db):
+    """常驻模式：按组的 batch_send_interval 定时批量推送"""
+    group_key = group["group_key"]
+    batch_interval = group["batch_send_interval"]
+    while not SHOULD_EXIT:
+        cycle_start = time.time()
+        try:
+            await process_batch_send(group, db)
+            next_send = await db.get_last_batch_sent_time(group_key) + batch_interval
+        except Exception as e:
+            logger.error(f"批量推送调度异常 [{group_key}]: {e}")
+            next_send = 0
+        if next_send <= time.time():
+            next_send = cycle_start + batch_interval
+        await wait_or_exit(next_send - time.time())
+
+class BatchFlusher:
+    """PG 常驻批量推送：LISTEN 新增待发送消息的通知，按组在 last_batch_sent + batch_send_interval 准时推送
+
+    没有新消息的组不唤醒、不查库；收到通知后等到该组的推送时刻再推送一次，
+    等待期间到达的通知并入同一次推送。
+    """
+    def __init__(self, db, groups):
+        self.db = db
+        self.groups = [group for group in groups if group.get("batch_send_interval")]
+        self._wakeups = {group["group_key"]: asyncio.Event() for group in self.groups}
+
+    def _on_notify(self, conn, pid, channel, payload):
+        wakeup = self._wakeups.get(payload)
+        if wakeup:
+            wakeup.set()
+
+    def tasks(self):
+        return [asyncio.create_task(self.listen())] + [
+            asyncio.create_task(self.group_loop(group)) for group in self.groups
+        ]
+
+    async def listen(self):
+        """维持一条 LISTEN 专用连接，断开后重连"""
+        while not SHOULD_EXIT:
+            try:
+                conn = await asyncpg.connect(PG_URL)
+            except Exception as e:
+                logger.error(f"LISTEN 连接失败: {e}")
+                await wait_or_exit(PG_LISTEN_RETRY)
+                continue
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda c: lost.set())
+            try:
+                await conn.add_listener(PENDING_NOTIFY_CHANNEL, self._on_notify)
+                logger.info(f"📡 已监听 {PENDING_NOTIFY_CHANNEL} 通知")
+                # 启动或重连期间可能漏掉通知，各组都检查一次积压
+                for wakeup in self._wakeups.values():
+                    wakeup.set()
+                await lost.wait()
+                logger.warning("LISTEN 连接断开，准备重连")
+            except Exception as e:
+                logger.error(f"LISTEN 异常: {e}")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+            await wait_or_exit(PG_LISTEN_RETRY)
+
+    async def group_loop(self, group):
+        group_key = group["group_key"]
+        wakeup = self._wakeups[group_key]
+        while not SHOULD_EXIT:
+            await wakeup.wait()
+            try:
+                deadline = await self.db.get_last_batch_sent_time(group_key) + group["batch_send_interval"]
+                await wait_or_exit(deadline - time.time())
+                if SHOULD_EXIT:
+                    return
+                # 此前提交的待发送消息都在本次推送范围内；等待用单调时钟，
+                # 与墙上时钟的间隔检查可能差几毫秒或因校时回拨而不一致，这里强制推送
+                wakeup.clear()
+                await process_batch_send(group, self.db, force=True)
+            except Exception as e:
+                logger.error(f"批量推送调度异常 [{group_key}]: {e}")
+                await wait_or_exit(PG_LISTEN_RETRY)
+
+async def show_feed_health():
+    """运维查询：打印各订阅源的健康状态（python rss.py --health）"""
+    db = RSSDatabase()
+    await db.open()
+    try:
+        await db.ensure_initialized()
+        rows = await db.list_feed_health()
+    finally:
+        await db.close()
+    now = time.time()
+    for row in rows:
+        if not row["open_until"]:
+            state = "正常"
+        elif row["open_until"] > now:
+            state = f"熔断({row['open_until'] - now:.0f}s)"
+        else:
+            state = "半开"
+        last_success = (
+            datetime.fromtimestamp(row["last_success"], pytz.utc).strftime("%Y-%m-%d %H:%M")
+            if row["last_success"] else "-"
+        )
+        latency = f"{row['latency']:.2f}s" if row["latency"] is not None else "-"
+        print(f"{state:<12} 失败 {row['failures']:<3} 状态 {row['last_status'] or '-':<4} 耗时 {latency:<8} "
+              f"最后成功 {last_success}  {row['feed_url']}  {row['last_error'] or ''}")
+
+async def run_daemon():
+    """常驻模式：单个事件循环内复用 session / 数据库连接 / Bot，按各组定时器调度"""
+    loop = asyncio.get_running_loop()
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, request_exit)
+
+    db = RSSDatabase()
+    lock_file = acquire_lock()
+    if not lock_file:
+        return
+
+    try:
+        await db.open()
+        await db.ensure_initialized()
+        translation_cache.db = db
+        mirror_selector.db = db
+        logger.info("✅ 常驻模式数据库连接成功")
+
+        async with create_http_session() as session:
+            # 投递队列中留下的消息，并定时重试暂时发送失败的消息
+            tasks = [
+                asyncio.create_task(send_queue.retry_loop(db, group))
+                for group in RSS_GROUPS
+            ]
+            tasks += [
+                asyncio.create_task(group_loop(session, group, db))
+                for group in RSS_GROUPS
+            ]
+            if USE_PG and PG_NOTIFY_FLUSH:
+                tasks += BatchFlusher(db, RSS_GROUPS).tasks()
+            else:
+                tasks += [
+                    asyncio.create_task(batch_loop(group, db))
+                    for group in RSS_GROUPS
+                    if group.get("batch_send_interval")
+                ]
+            await EXIT_EVENT.wait()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    except Exception as e:
+        logger.error(f"常驻模式执行异常: {str(e)}")
+    finally:
+        await cleanup_resources(db, lock_file)
+
+async def run_flusher():
+    """只做批量推送的常驻进程（python rss.py --flusher），配合 cron 采集使用，仅支持 PG"""
+    if not USE_PG:
+        logger.error("❌ --flusher 依赖 PostgreSQL LISTEN/NOTIFY，请配置 PG_URL")
+        return
+    loop = asyncio.get_running_loop()
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, request_exit)
+
+    db = RSSDatabase()
+    try:
+        await db.open()
+        await db.ensure_initialized()
+        logger.info("✅ 批量推送进程已启动")
+        tasks = [asyncio.create_task(send_queue.retry_loop(db, group)) for group in RSS_GROUPS]
+        tasks += BatchFlusher(db, RSS_GROUPS).tasks()
+        await EXIT_EVENT.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    except Exception as e:
+        logger.error(f"批量推送进程异常: {str(e)}")
+    finally:
+        await cleanup_resources(db, None)
+
 async def cleanup_resources(db, lock_file):
     """清理资源"""
+    translation_cache.db = None
+    mirror_selector.db = None
+    await bot_registry.shutdown()
     try:
         if db:
             await db.close()
@@ -1487,7 +2192,12 @@ if __name__ == "__main__":
     for s in (signal.SIGINT, signal.SIGTERM):
         signal.signal(s, signal_handler)
     try:
-        asyncio.run(main())
+        if "--health" in sys.argv[1:]:
+            asyncio.run(show_feed_health())
+        elif "--flusher" in sys.argv[1:]:
+            asyncio.run(run_flusher())
+        else:
+            asyncio.run(main(daemon="--daemon" in sys.argv[1:]))
     except Exception as e:
         logger.critical(f"‼️ 主进程未捕获异常: {str(e)}", exc_info=True)
         sys.exit(1)
\ No newline at end of file
@@ -1,10 +1,34 @@
 #!/bin/bash
 
-# 检查rss.py进程是否在运行
-if pgrep -f "rss.py" > /dev/null; then
+# 常驻模式：bash rss.sh --daemon（已在运行则直接退出，不会重复启动）
+if [ "$1" = "--daemon" ]; then
+    if pgrep -f "rss.py --daemon" > /dev/null; then
+        echo "rss.py 常驻进程已在运行"
+        exit 0
+    fi
+    source ~/rss/rss_venv/bin/activate
+    nohup python3 ~/rss/rss.py --daemon > /dev/null 2>&1 &
+    echo "常驻模式启动成功"
+    exit 0
+fi
+
+# 批量推送进程（PG）：bash rss.sh --flusher，配合下面的 cron 采集使用
+if [ "$1" = "--flusher" ]; then
+    if pgrep -f "rss.py --flusher" > /dev/null; then
+        echo "rss.py 批量推送进程已在运行"
+        exit 0
+    fi
+    source ~/rss/rss_venv/bin/activate
+    nohup python3 ~/rss/rss.py --flusher > /dev/null 2>&1 &
+    echo "批量推送进程启动成功"
+    exit 0
+fi
+
+# 检查rss.py进程是否在运行（只匹配不带参数的采集进程，不影响 --flusher）
+if pgrep -f "rss.py$" > /dev/null; then
     echo "检测到rss.py正在运行，正在停止该进程..."
     # 终止rss.py进程
-    pkill -f "rss.py"
+    pkill -f "rss.py$"
 fi
 # 等待2秒确保进程完全终止
 sleep 2
@@ -12,4 +36,4 @@ sleep 2
 source ~/rss/rss_venv/bin/activate
 nohup python3 ~/rss/rss.py > /dev/null 2>&1 &
 
-echo "脚本执行成功"
\ No newline at end of file
+echo "脚本执行成功"
@@ -1,12 +1,10 @@
 import asyncio
 import aiohttp
 import logging
-import re
 import os
 import hashlib
 import pytz
 import fcntl
-import sqlite3
 import time
 import signal
 import sys
@@ -16,13 +14,12 @@ from dotenv import load_dotenv
 from feedparser import parse
 from telegram import Bot
 from telegram.error import BadRequest
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
+import tmt_service
+import textnorm
+import rss_store
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
 
 # 加载.env文件
@@ -338,7 +335,7 @@ RSS_GROUPS = [
 ]
 
 # 新增通用处理函数
-async def process_group(session, group_config, global_status):
+async def process_group(session, group_config):
     """统一处理RSS组（确保发送成功后才保存状态，所有状态都用canonical_url）"""
     group_name = group_config["name"]
     group_key = group_config["group_key"]
@@ -365,16 +362,18 @@ async def process_group(session, group_config, global_status):
                 feed_data, canonical_url = await fetch_feed(session, feed_url)
                 if not feed_data or not feed_data.entries:
                     continue
-                processed_ids = global_status.get(canonical_url, set())
-
-                # ------ 2.2 加载处理状态 & 收集新条目 ------
+                # ------ 2.2 查询处理状态（整源一次查询） & 收集新条目 ------
+                entry_ids = [get_entry_identifier(entry) for entry in feed_data.entries]
+                unseen = {
+                    entry_id for entry_id, _ in
+                    await store.filter_new(group_key, canonical_url, [(entry_id, None) for entry_id in entry_ids])
+                }
                 new_entries = []
                 pending_entry_ids = []
                 seen_in_batch = set()
 
-                for entry in feed_data.entries:
-                    entry_id = get_entry_identifier(entry)
-                    if entry_id in processed_ids or entry_id in seen_in_batch:
+                for entry, entry_id in zip(feed_data.entries, entry_ids):
+                    if entry_id not in unseen or entry_id in seen_in_batch:
                         continue
                     seen_in_batch.add(entry_id)
 
@@ -405,11 +404,7 @@ async def process_group(session, group_config, global_status):
                                 feed_message,
                                 disable_web_page_preview=not processor.get("preview", True)
                             )
-                            for entry_id in pending_entry_ids:
-                                await save_single_status(group_key, canonical_url, entry_id)
-                                processed_ids.add(entry_id)
-
-                            global_status[canonical_url] = processed_ids
+                            await save_statuses(group_key, canonical_url, pending_entry_ids)
 
                         except Exception as send_error:
                             logger.error(f"❌ 发送消息失败 [{feed_url}]")
@@ -470,90 +465,24 @@ async def generate_group_message(feed_data, entries, processor):
         logger.error(f"生成消息失败: {str(e)}")
         return ""
 
-def create_connection():
-    """创建 SQLite 数据库连接"""
-    conn = None
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        return conn
-    except sqlite3.Error as e:
-        logger.error(f"连接数据库失败: {e}")
-    return conn
-
-def create_table():
-    conn = create_connection()
-    if conn is not None:
-        try:
-            cursor = conn.cursor()
-            # 仅保留SQLite建表语句
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rss_status (
-                    feed_group TEXT,
-                    feed_url TEXT,
-                    entry_url TEXT,
-                    entry_timestamp REAL,
-                    PRIMARY KEY (feed_group, feed_url, entry_url)
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_run_time REAL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_cleanup_time REAL
-                )
-            """)
-            conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"创建本地表失败: {e}")
-        finally:
-            conn.close()
+store = rss_store.SQLStore(rss_store.SQLiteEngine(DATABASE_FILE))  # 本地 SQLite 存储，main() 中打开
 
 async def load_last_run_time_from_db(feed_group):
-    """仅使用SQLite加载时间戳"""
-    conn = create_connection()
-    if conn is not None:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        except sqlite3.Error as e:
-            logger.error(f"从本地数据库加载时间失败: {e}")
-            return 0
-        finally:
-            conn.close()
-    return 0
+    try:
+        return await store.load_last_run_time(feed_group)
+    except Exception as e:
+        logger.error(f"从本地数据库加载时间失败: {e}")
+        return 0
 
 async def save_last_run_time_to_db(feed_group, last_run_time):
-    conn = create_connection()
-    if conn is not None:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("BEGIN TRANSACTION")
-            cursor.execute("""
-                INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                VALUES (?, ?)
-            """, (feed_group, last_run_time))
-            conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"时间戳保存失败: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
+    try:
+        await store.save_last_run_time(feed_group, last_run_time)
+    except Exception as e:
+        logger.error(f"时间戳保存失败: {e}")
 
 def remove_html_tags(text):
-    text = re.sub(r'#([^#\s]+)#', r'\1', text)  # 匹配 #文字# → 文字
-    text = re.sub(r'#\w+', '', text)    # 移除 hashtags
-    text = re.sub(r'@[^\s]+', '', text).strip()     # 移除 @提及
-    text = re.sub(r'【\s*】', '', text)    # 移除 【】符号（含中间空格）
-    text = re.sub(r'(?<!\S)#(?!\S)', '', text)
-    text = re.sub(r'(?<!\S)：(?!\S)', '', text)
-    return text
+    # 本脚本不去除 HTML 标签，只处理话题标签 / @提及 / 空【】
+    return textnorm.clean_text(text, strip_html=False)
 
 
 @retry(
@@ -637,7 +566,6 @@ async def fetch_feed(session, feed_url):
     return None, canonical_url
 
 async def translate_with_credentials(secret_id, secret_key, text):
-    loop = asyncio.get_running_loop()
     text_bytes = text.encode('utf-8')
     if len(text_bytes) > 2000:
         safe_bytes = text_bytes[:2000]
@@ -646,25 +574,14 @@ async def translate_with_credentials(secret_id, secret_key, text):
         text = safe_bytes.decode('utf-8', errors='ignore')
         logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
     try:
-        return await loop.run_in_executor(
-            None, 
-            lambda: _sync_translate(secret_id, secret_key, text)
-        )
+        return await tmt_service.run_sync(_sync_translate, secret_id, secret_key, text)
     except Exception as e:
         logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
         raise
 
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        return tmt_service.translate_text(secret_id, secret_key, TENCENT_REGION, remove_html_tags(text))
     except TencentCloudSDKException as e:
         error_details = {
             "code": e.code,
@@ -719,47 +636,13 @@ async def auto_translate_text(text):
         cleaned = remove_html_tags(text)
         return escape(cleaned)
 
-async def load_status():
-    status = {}
-    conn = create_connection()
-    if conn is not None:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT feed_url, entry_url FROM rss_status")
-            for feed_url, entry_url in cursor.fetchall():
-                if feed_url not in status:
-                    status[feed_url] = set()
-                status[feed_url].add(entry_url)
-        except sqlite3.Error as e:
-            logger.error(f"本地状态加载失败: {e}")
-        finally:
-            conn.close()
-    return status
-
-async def save_single_status(feed_group, feed_url, entry_url):
-    timestamp = time.time()
-    max_retries = 3
-    for attempt in range(max_retries):
-        conn = create_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("BEGIN TRANSACTION")
-                cursor.execute("""
-                    INSERT OR IGNORE INTO rss_status 
-                    VALUES (?, ?, ?, ?)
-                """, (feed_group, feed_url, entry_url, timestamp))
-                conn.commit()
-                return
-            except sqlite3.OperationalError as e:
-                if "locked" in str(e) and attempt < max_retries - 1:
-                    await asyncio.sleep(0.1 * (attempt + 1))
-                    continue
-                logger.error(f"SQLite保存失败（尝试{attempt+1}次）: {e}")
-            except sqlite3.Error as e:
-                logger.error(f"SQLite错误: {e}")
-            finally:
-                conn.close()
+async def save_statuses(feed_group, feed_url, entry_urls):
+    """整源的状态记录一个事务写入"""
+    now = time.time()
+    try:
+        await store.record_entries(feed_group, feed_url, [(entry_url, None, now) for entry_url in entry_urls])
+    except Exception as e:
+        logger.error(f"SQLite保存失败: {e}")
 
 def get_entry_identifier(entry):
     if hasattr(entry, 'guid') and entry.guid:
@@ -786,54 +669,11 @@ def get_entry_timestamp(entry):
         dt = datetime(*entry.updated_parsed[:6], tzinfo=pytz.utc)
     return dt
 
-async def process_feed_common(session, feed_group, feed_url, status):
+async def cleanup_history(days, feed_group):
     try:
-        feed_data = await fetch_feed(session, feed_url)
-        if not feed_data or not feed_data.entries:
-            return None
-        processed_ids = status.get(feed_url, set())
-        new_entries = []
-        for entry in feed_data.entries:
-            entry_id = get_entry_identifier(entry)
-            if entry_id in processed_ids:
-                continue
-            new_entries.append(entry)
-            await save_single_status(feed_group, feed_url, entry_id)
-            processed_ids.add(entry_id)
-        status[feed_url] = processed_ids  # 更新内存状态
-        return feed_data, new_entries
+        await store.cleanup_history(days, feed_group)
     except Exception as e:
-        return None
-
-def cleanup_history(days, feed_group):
-    conn = create_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?", 
-                (feed_group,)
-            )
-            result = cursor.fetchone()
-            last_cleanup = result[0] if result else 0
-            now = time.time()
-            if now - last_cleanup < 86400:
-                return
-            cutoff_ts = now - days * 86400
-            cursor.execute(
-                "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                (feed_group, cutoff_ts)
-            )
-            affected_rows = cursor.rowcount
-            cursor.execute("""
-                INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                VALUES (?, ?)
-            """, (feed_group, now))
-            conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"❌ 日志清理失败: 组={feed_group}, 错误={e}")
-        finally:
-            conn.close()
+        logger.error(f"❌ 日志清理失败: 组={feed_group}, 错误={e}")
 
 def signal_handler(signum, frame):
     logger.warning(f"收到信号 {signum}，程序即将退出。")
@@ -851,23 +691,24 @@ async def main():
         logger.critical(f"‼️ 文件锁异常: {str(e)}")
         return
     try:
-        create_table()
+        await store.open()
+        await store.ensure_initialized()
     except Exception as e:
         logger.critical(f"‼️ 数据库初始化失败: {str(e)}")
+        await store.close()
         return
     for group in RSS_GROUPS:
         days = group.get("history_days", 30)
         try:
-            cleanup_history(days, group["group_key"])
+            await cleanup_history(days, group["group_key"])
         except Exception as e:
             logger.error(f"清理历史记录异常: 组={group['group_key']}, 错误={e}")
     async with aiohttp.ClientSession() as session:
         try:
-            status = await load_status()
             tasks = []
             for group in RSS_GROUPS:
                 try:
-                    tasks.append(process_group(session, group, status))
+                    tasks.append(process_group(session, group))
                 except Exception as e:
                     logger.error(f"⚠️ 创建任务失败 [{group['name']}]: {str(e)}")
             if tasks:
@@ -886,6 +727,7 @@ async def main():
                 await session.close()
             except Exception as e:
                 logger.error(f"⚠️ 关闭会话失败: {str(e)}")
+    await store.close()
     try:
         if lock_file:
             fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -896,7 +738,6 @@ async def main():
 if __name__ == "__main__":
     for s in (signal.SIGINT, signal.SIGTERM):
         signal.signal(s, signal_handler)
-    create_table()
     try:
         asyncio.run(main())
     except Exception as e:
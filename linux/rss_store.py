@@ -0,0 +1,969 @@
+"""RSS 状态存储
+
+rss.py / sql_rss.py / sql_rss2.py / rss2.py 共用：
+- RSSStore 协议约定各脚本共同使用的状态读写接口；
+- SQLiteEngine / PostgresEngine 统一连接管理和执行接口：SQL 只写一份，使用 $1 占位符，
+  SQLite 下转换为 ?1；连接池、SQLite 调优参数（sqlite_profile）和语句缓存都在引擎里配置；
+- SQLStore 在任一引擎上实现 RSSStore（entry_status / pending_messages / send_queue 表结构），
+  条目状态以 16 字节摘要存入 entry_status，组名、源地址驻留为整数 id；按源批量去重（filter_new）、
+  单事务批量写入（record_entries）和发送队列认领都在这里实现，rss.py 的 RSSDatabase
+  继承它并只增加校验信息、翻译缓存等本脚本专用的表；
+- MemoryStore 用字典实现同样的接口，供 bench_store.py 基准和脚本离线调试使用。
+"""
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Protocol
+
+import sqlite_profile
+
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "10"))          # PG 连接池最小连接数
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))          # PG 连接池最大连接数
+PG_STATEMENT_CACHE = int(os.getenv("PG_STATEMENT_CACHE", "256"))     # 每个 PG 连接缓存的预编译语句数
+SQLITE_MAX_PARAMS = 500    # SQLite 单条语句参数个数上限（IN 列表按此分块）
+PENDING_CHUNK_SIZE = 200   # 批量推送每次读取的待发送消息行数
+CLEANUP_INTERVAL = 86400   # 历史清理的最小间隔（秒）
+SEND_CLAIM_BATCH = int(os.getenv("SEND_CLAIM_BATCH", "20"))          # 每次从发送队列认领的消息条数
+SEND_CLAIM_LEASE = float(os.getenv("SEND_CLAIM_LEASE", "300"))       # 认领租约（秒），过期未发送的消息可被重新认领
+DIGEST_KEY_BYTES = 16    # 条目标识/内容哈希入库时保留的摘要字节数
+STATUS_MIGRATION_KEY = "entry_status_migrated"  # schema_meta 中 rss_status 迁移完成标记
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_RE = re.compile(r'\$(\d+)')
+
+
+@lru_cache(maxsize=1024)
+def _sqlite_sql(sql):
+    """$1 占位符转换为 SQLite 的 ?1"""
+    return _PLACEHOLDER_RE.sub(r'?\1', sql)
+
+
+def _rowcount(status):
+    """asyncpg 的命令状态（如 'UPDATE 3'）转换为影响行数"""
+    tail = status.rsplit(' ', 1)[-1] if status else ''
+    return int(tail) if tail.isdigit() else 0
+
+
+def digest_key(hex_digest):
+    """64 位十六进制 SHA-256 摘要 -> 16 字节二进制键（非十六进制输入先做 SHA-256）"""
+    if hex_digest is None:
+        return None
+    try:
+        return bytes.fromhex(hex_digest[:DIGEST_KEY_BYTES * 2])
+    except ValueError:
+        return hashlib.sha256(hex_digest.encode('utf-8')).digest()[:DIGEST_KEY_BYTES]
+
+
+def placeholders(start, count):
+    """生成 $start, $start+1, ... 共 count 个占位符，用于 IN 列表"""
+    return ", ".join(f"${i}" for i in range(start, start + count))
+
+
+class HandoffConflict(Exception):
+    """待发送消息已被其他实例移交给发送队列"""
+
+
+class RSSStore(Protocol):
+    """各脚本共用的状态存储接口"""
+
+    async def open(self): ...
+    async def close(self): ...
+    async def ensure_initialized(self): ...
+    async def load_last_run_time(self, feed_group): ...
+    async def save_last_run_time(self, feed_group, last_run_time): ...
+    async def get_last_batch_sent_time(self, feed_group): ...
+    async def save_last_batch_sent_time(self, feed_group, ts): ...
+    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title,
+                                  translated_title, link, summary, timestamp, feed_title): ...
+    def iter_pending_messages(self, feed_group, chunk_size=PENDING_CHUNK_SIZE): ...
+    async def mark_pending_as_sent(self, feed_group, ids): ...
+    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp): ...
+    async def has_content_hash(self, feed_group, content_hash): ...
+    async def filter_new(self, feed_group, feed_url, candidates): ...
+    async def record_entries(self, feed_group, feed_url, statuses, pending=None, outbox=None): ...
+    async def enqueue_messages(self, feed_group, chat_id, message, disable_preview,
+                               sent_entry_ids=None, feed_url=None): ...
+    async def claim_queued_messages(self, feed_group, owner, limit=SEND_CLAIM_BATCH, lease=SEND_CLAIM_LEASE): ...
+    async def has_queued_messages(self, feed_group): ...
+    async def release_queued_messages(self, feed_group, owner): ...
+    async def delete_queued_message(self, message_id, owner): ...
+    async def cleanup_history(self, days, feed_group): ...
+
+
+# ========== 引擎 ==========
+
+class _SQLiteHandle:
+    """aiosqlite 连接的统一执行接口"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def execute(self, sql, *args):
+        cursor = await self.conn.execute(_sqlite_sql(sql), args)
+        count = cursor.rowcount
+        await cursor.close()
+        return count
+
+    async def executemany(self, sql, rows):
+        await self.conn.executemany(_sqlite_sql(sql), rows)
+
+    async def fetch(self, sql, *args):
+        async with self.conn.execute(_sqlite_sql(sql), args) as cursor:
+            keys = [d[0] for d in cursor.description]
+            return [dict(zip(keys, row)) for row in await cursor.fetchall()]
+
+    async def fetchrow(self, sql, *args):
+        async with self.conn.execute(_sqlite_sql(sql), args) as cursor:
+            row = await cursor.fetchone()
+            return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+    async def fetchval(self, sql, *args):
+        async with self.conn.execute(_sqlite_sql(sql), args) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+
+class _PGHandle:
+    """asyncpg 连接的统一执行接口"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def execute(self, sql, *args):
+        return _rowcount(await self.conn.execute(sql, *args))
+
+    async def executemany(self, sql, rows):
+        await self.conn.executemany(sql, rows)
+
+    async def fetch(self, sql, *args):
+        return [dict(row) for row in await self.conn.fetch(sql, *args)]
+
+    async def fetchrow(self, sql, *args):
+        row = await self.conn.fetchrow(sql, *args)
+        return dict(row) if row else None
+
+    async def fetchval(self, sql, *args):
+        return await self.conn.fetchval(sql, *args)
+
+
+class SQLiteEngine:
+    """单个 aiosqlite 连接，语句和事务按顺序独占执行，每条语句执行后提交"""
+    dialect = "sqlite"
+    types = {"serial": "INTEGER PRIMARY KEY", "bigserial": "INTEGER PRIMARY KEY AUTOINCREMENT",
+             "blob": "BLOB", "without_rowid": "WITHOUT ROWID"}
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self._lock = asyncio.Lock()
+
+    async def open(self):
+        self.conn = await sqlite_profile.connect_async(self.path)
+        self._handle = _SQLiteHandle(self.conn)
+
+    async def close(self):
+        if self.conn:
+            await sqlite_profile.close_async(self.conn)
+            self.conn = None
+
+    async def _run(self, method, *args):
+        async with self._lock:
+            try:
+                result = await getattr(self._handle, method)(*args)
+                if self.conn.in_transaction:
+                    await self.conn.commit()
+                return result
+            except BaseException:
+                if self.conn.in_transaction:
+                    await self.conn.rollback()
+                raise
+
+    async def execute(self, sql, *args):
+        return await self._run("execute", sql, *args)
+
+    async def executemany(self, sql, rows):
+        return await self._run("executemany", sql, rows)
+
+    async def fetch(self, sql, *args):
+        return await self._run("fetch", sql, *args)
+
+    async def fetchrow(self, sql, *args):
+        return await self._run("fetchrow", sql, *args)
+
+    async def fetchval(self, sql, *args):
+        return await self._run("fetchval", sql, *args)
+
+    @asynccontextmanager
+    async def transaction(self, immediate=False):
+        """事务内的语句通过返回的句柄执行，退出时一次提交，异常时回滚
+
+        immediate=True 时以 BEGIN IMMEDIATE 开始，先取得写锁，先查询后更新的
+        两条语句之间不会插入其他进程的写入。
+        """
+        async with self._lock:
+            try:
+                if immediate:
+                    await self.conn.execute("BEGIN IMMEDIATE")
+                yield self._handle
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+
+    async def table_exists(self, table):
+        return await self.fetchval(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=$1", table
+        ) is not None
+
+    async def add_column(self, table, column, decl):
+        """旧库补充字段，已存在时跳过"""
+        columns = {row["name"] for row in await self.fetch(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            await self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+class PostgresEngine:
+    """asyncpg 连接池，每条语句从池中取连接执行"""
+    dialect = "pg"
+    types = {"serial": "SERIAL PRIMARY KEY", "bigserial": "BIGSERIAL PRIMARY KEY",
+             "blob": "BYTEA", "without_rowid": ""}
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.pool = None
+
+    async def open(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=min(PG_POOL_MIN_SIZE, PG_POOL_MAX_SIZE),
+            max_size=PG_POOL_MAX_SIZE,
+            statement_cache_size=PG_STATEMENT_CACHE
+        )
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    async def _run(self, method, *args):
+        async with self.pool.acquire() as conn:
+            return await getattr(_PGHandle(conn), method)(*args)
+
+    async def execute(self, sql, *args):
+        return await self._run("execute", sql, *args)
+
+    async def executemany(self, sql, rows):
+        return await self._run("executemany", sql, rows)
+
+    async def fetch(self, sql, *args):
+        return await self._run("fetch", sql, *args)
+
+    async def fetchrow(self, sql, *args):
+        return await self._run("fetchrow", sql, *args)
+
+    async def fetchval(self, sql, *args):
+        return await self._run("fetchval", sql, *args)
+
+    @asynccontextmanager
+    async def transaction(self, immediate=False):
+        """immediate 只对 SQLite 有意义，PG 靠行锁"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                yield _PGHandle(conn)
+
+    async def table_exists(self, table):
+        return await self.fetchval("SELECT to_regclass($1) IS NOT NULL", table)
+
+    async def add_column(self, table, column, decl):
+        await self.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {decl}")
+
+
+def create_engine(pg_url, sqlite_path):
+    """配置了 PG_URL 时使用 PostgreSQL，否则使用 SQLite 文件"""
+    return PostgresEngine(pg_url) if pg_url else SQLiteEngine(sqlite_path)
+
+
+# ========== SQL 存储 ==========
+
+class SQLStore:
+    """在 SQLiteEngine / PostgresEngine 上实现 RSSStore，状态记录在 entry_status 表"""
+
+    PENDING_COLUMNS = ("feed_url", "entry_id", "title", "translated_title", "link", "summary", "entry_timestamp", "feed_title")
+
+    # entry_status 还有 (group_id, content_key) 唯一索引：SQLite 沿用 REPLACE 覆盖冲突行，PG 按主键更新
+    STATUS_UPSERT = {
+        "pg": """
+            INSERT INTO entry_status (group_id, feed_id, entry_key, content_key, entry_timestamp)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (group_id, feed_id, entry_key)
+            DO UPDATE SET
+                content_key = EXCLUDED.content_key,
+                entry_timestamp = EXCLUDED.entry_timestamp
+        """,
+        "sqlite": """
+            INSERT OR REPLACE INTO entry_status (group_id, feed_id, entry_key, content_key, entry_timestamp)
+            VALUES ($1, $2, $3, $4, $5)
+        """,
+    }
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._group_ids = {}  # 组名 -> group_id 缓存
+        self._feed_ids = {}   # 源地址 -> feed_id 缓存
+
+    async def open(self):
+        await self.engine.open()
+
+    async def close(self):
+        await self.engine.close()
+
+    async def ensure_initialized(self):
+        """确保数据库表已创建，旧 rss_status 已迁移"""
+        await self.create_tables()
+        await self.migrate_legacy_status()
+
+    async def create_tables(self):
+        await self.create_status_tables()
+        await self.create_shared_tables()
+
+    async def create_status_tables(self):
+        types = self.engine.types
+        # 组名、源地址驻留为整数 id
+        await self.engine.execute(f"""
+            CREATE TABLE IF NOT EXISTS feed_groups (
+                id {types['serial']},
+                name TEXT UNIQUE NOT NULL
+            )
+        """)
+        await self.engine.execute(f"""
+            CREATE TABLE IF NOT EXISTS feeds (
+                id {types['serial']},
+                url TEXT UNIQUE NOT NULL
+            )
+        """)
+        # 主表：条目标识和内容哈希存 16 字节摘要
+        await self.engine.execute(f"""
+            CREATE TABLE IF NOT EXISTS entry_status (
+                group_id INTEGER,
+                feed_id INTEGER,
+                entry_key {types['blob']},
+                content_key {types['blob']},
+                entry_timestamp DOUBLE PRECISION,
+                PRIMARY KEY (group_id, feed_id, entry_key)
+            ) {types['without_rowid']}
+        """)
+        await self.engine.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_entry_status_content
+            ON entry_status(group_id, content_key)
+        """)
+        # 表结构迁移记录
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS schema_meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+
+    async def migrate_legacy_status(self):
+        """一次性迁移：旧 rss_status（十六进制 TEXT）的全部记录复制到 entry_status
+
+        四个脚本都改用 entry_status 后不再读写 rss_status，旧表只复制不删除；
+        完成后在 schema_meta 写入 STATUS_MIGRATION_KEY，之后启动不再扫描旧表。
+        """
+        if await self.engine.fetchval(
+            "SELECT value FROM schema_meta WHERE name=$1", STATUS_MIGRATION_KEY
+        ) is not None:
+            return
+        legacy = await self.engine.table_exists("rss_status")
+        if legacy:
+            # rss2.py 旧表没有内容哈希字段
+            await self.engine.add_column("rss_status", "entry_content_hash", "TEXT")
+        rows = []
+        async with self.engine.transaction() as db:
+            if legacy:
+                rows = await db.fetch(
+                    "SELECT feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp FROM rss_status"
+                )
+            group_ids = {}
+            for name in {row['feed_group'] for row in rows}:
+                group_ids[name] = await self._intern(db, "feed_groups", "name", name)
+            feed_ids = {}
+            for url in {row['feed_url'] for row in rows}:
+                feed_ids[url] = await self._intern(db, "feeds", "url", url)
+            # 早先 rss.py 已迁移过的行和跨组重复的内容哈希都跳过
+            await db.executemany("""
+                INSERT INTO entry_status (group_id, feed_id, entry_key, content_key, entry_timestamp)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT DO NOTHING
+            """, [
+                (group_ids[row['feed_group']], feed_ids[row['feed_url']],
+                 digest_key(row['entry_url']), digest_key(row['entry_content_hash']), row['entry_timestamp'])
+                for row in rows
+            ])
+            await db.execute("""
+                INSERT INTO schema_meta (name, value) VALUES ($1, $2)
+                ON CONFLICT (name) DO NOTHING
+            """, STATUS_MIGRATION_KEY, str(time.time()))
+            # 早先 rss.py 把迁移标记记在 timestamps 表里
+            await db.execute("DELETE FROM timestamps WHERE feed_group=$1", "__entry_status_migrated__")
+        self._group_ids.clear()
+        self._feed_ids.clear()
+        if rows:
+            logger.warning(f"rss_status 已复制到 entry_status，共 {len(rows)} 条")
+
+    @staticmethod
+    async def _intern(db, table, column, value):
+        await db.execute(
+            f"INSERT INTO {table} ({column}) VALUES ($1) ON CONFLICT ({column}) DO NOTHING", value
+        )
+        return await db.fetchval(f"SELECT id FROM {table} WHERE {column}=$1", value)
+
+    async def _ids(self, feed_group, feed_url, create=True):
+        """组名、源地址 -> (group_id, feed_id)；create=False 时不存在返回 None"""
+        group_id = self._group_ids.get(feed_group)
+        feed_id = self._feed_ids.get(feed_url) if feed_url is not None else None
+        if group_id is not None and (feed_url is None or feed_id is not None):
+            return group_id, feed_id
+        if create:
+            group_id = await self._intern(self.engine, "feed_groups", "name", feed_group)
+            if feed_url is not None:
+                feed_id = await self._intern(self.engine, "feeds", "url", feed_url)
+        else:
+            group_id = await self.engine.fetchval("SELECT id FROM feed_groups WHERE name=$1", feed_group)
+            if feed_url is not None:
+                feed_id = await self.engine.fetchval("SELECT id FROM feeds WHERE url=$1", feed_url)
+        if group_id is not None:
+            self._group_ids[feed_group] = group_id
+        if feed_id is not None:
+            self._feed_ids[feed_url] = feed_id
+        if group_id is None or (feed_url is not None and feed_id is None):
+            return None
+        return group_id, feed_id
+
+    async def create_shared_tables(self):
+        """各脚本共用的时间戳和待发送消息表"""
+        for table, column in (
+            ("timestamps", "last_run_time"),
+            ("cleanup_timestamps", "last_cleanup_time"),
+            ("batch_timestamps", "last_batch_sent_time"),
+        ):
+            await self.engine.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    feed_group TEXT PRIMARY KEY,
+                    {column} DOUBLE PRECISION
+                )
+            """)
+        await self.engine.execute("""
+            CREATE TABLE IF NOT EXISTS pending_messages (
+                feed_group TEXT,
+                feed_url TEXT,
+                entry_id TEXT,
+                content_hash TEXT,
+                title TEXT,
+                translated_title TEXT,
+                link TEXT,
+                summary TEXT,
+                entry_timestamp DOUBLE PRECISION,
+                sent INTEGER DEFAULT 0,
+                feed_title TEXT,
+                PRIMARY KEY (feed_group, feed_url, entry_id)
+            )
+        """)
+        # sql_rss2.py 旧表没有 feed_title 字段
+        await self.engine.add_column("pending_messages", "feed_title", "TEXT")
+        # 只索引未发送的行，批量推送按 (feed_url, entry_timestamp, entry_id) 游标分页读取
+        await self.engine.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pending_unsent
+            ON pending_messages (feed_group, feed_url, entry_timestamp, entry_id)
+            WHERE sent=0
+        """)
+        await self.engine.execute(f"""
+            CREATE TABLE IF NOT EXISTS send_queue (
+                id {self.engine.types['bigserial']},
+                feed_group TEXT,
+                chat_id TEXT,
+                text TEXT,
+                disable_preview INTEGER DEFAULT 0,
+                created_time DOUBLE PRECISION,
+                claim_owner TEXT,
+                claim_expires DOUBLE PRECISION DEFAULT 0
+            )
+        """)
+        # 旧库补充认领租约字段
+        await self.engine.add_column("send_queue", "claim_owner", "TEXT")
+        await self.engine.add_column("send_queue", "claim_expires", "DOUBLE PRECISION DEFAULT 0")
+        await self.engine.execute("""
+            CREATE INDEX IF NOT EXISTS idx_send_queue_group ON send_queue (feed_group, id)
+        """)
+
+    # ---------- 时间戳 ----------
+
+    async def _get_timestamp(self, table, column, feed_group):
+        value = await self.engine.fetchval(f"SELECT {column} FROM {table} WHERE feed_group=$1", feed_group)
+        return value if value is not None else 0
+
+    async def _save_timestamp(self, table, column, feed_group, ts, db=None):
+        await (db or self.engine).execute(f"""
+            INSERT INTO {table} (feed_group, {column}) VALUES ($1, $2)
+            ON CONFLICT (feed_group) DO UPDATE SET {column}=EXCLUDED.{column}
+        """, feed_group, ts)
+
+    async def load_last_run_time(self, feed_group):
+        return await self._get_timestamp("timestamps", "last_run_time", feed_group)
+
+    async def save_last_run_time(self, feed_group, last_run_time):
+        await self._save_timestamp("timestamps", "last_run_time", feed_group, last_run_time)
+
+    async def get_last_batch_sent_time(self, feed_group):
+        return await self._get_timestamp("batch_timestamps", "last_batch_sent_time", feed_group)
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        await self._save_timestamp("batch_timestamps", "last_batch_sent_time", feed_group, ts)
+
+    # ---------- 待发送消息 ----------
+
+    PENDING_INSERT = """
+        INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10)
+        ON CONFLICT DO NOTHING
+    """
+
+    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
+        await self.engine.execute(
+            self.PENDING_INSERT,
+            feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title
+        )
+
+    async def iter_pending_messages(self, feed_group, chunk_size=PENDING_CHUNK_SIZE):
+        """按 (feed_url, entry_timestamp, entry_id) 游标分页读取未发送消息，每次产出一批行
+
+        同一订阅源的行连续产出；走 idx_pending_unsent 部分索引，不扫描已发送的历史行。
+        """
+        cursor = ("", float("-inf"), "")
+        columns = ", ".join(self.PENDING_COLUMNS)
+        while True:
+            rows = await self.engine.fetch(f"""
+                SELECT {columns} FROM pending_messages
+                WHERE feed_group=$1 AND sent=0
+                AND (feed_url, entry_timestamp, entry_id) > ($2, $3, $4)
+                ORDER BY feed_url, entry_timestamp, entry_id
+                LIMIT $5
+            """, feed_group, *cursor, chunk_size)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last = rows[-1]
+            cursor = (last["feed_url"], last["entry_timestamp"], last["entry_id"])
+
+    async def get_pending_messages(self, feed_group):
+        """全部未发送消息（按订阅源、时间排序）"""
+        pending = []
+        async for rows in self.iter_pending_messages(feed_group):
+            pending.extend(rows)
+        return pending
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        if not ids:
+            return
+        await self.engine.executemany("""
+            UPDATE pending_messages SET sent=1
+            WHERE feed_group=$1 AND entry_id=$2
+        """, [(feed_group, eid) for eid in ids])
+
+    # ---------- 状态记录 ----------
+
+    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
+        await self.record_entries(feed_group, feed_url, [(entry_url, entry_content_hash, timestamp)])
+
+    async def record_entries(self, feed_group, feed_url, statuses, pending=None, outbox=None):
+        """在一个事务内批量写入待发送消息和状态记录，只提交一次
+
+        statuses: [(entry_url, entry_content_hash, timestamp), ...]
+        pending:  [(entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, feed_title), ...]
+        outbox:   (chat_id, message, disable_preview)，与状态一起写入 send_queue
+        """
+        if not statuses and not pending:
+            return
+        queue_rows = self._queue_rows(feed_group, *outbox) if outbox else []
+        group_id, feed_id = await self._ids(feed_group, feed_url)
+        status_rows = [
+            (group_id, feed_id, digest_key(entry_url), digest_key(content_hash), ts)
+            for entry_url, content_hash, ts in (statuses or [])
+        ]
+        async with self.engine.transaction() as db:
+            if pending:
+                await db.executemany(self.PENDING_INSERT, [(feed_group, feed_url, *row) for row in pending])
+            if status_rows:
+                await db.executemany(self.STATUS_UPSERT[self.engine.dialect], status_rows)
+            if queue_rows:
+                await db.executemany(self.QUEUE_INSERT, queue_rows)
+
+    async def has_content_hash(self, feed_group, content_hash):
+        ids = await self._ids(feed_group, None, create=False)
+        if ids is None:
+            return False
+        group_id, _ = ids
+        return await self.engine.fetchval(
+            "SELECT 1 FROM entry_status WHERE group_id=$1 AND content_key=$2 LIMIT 1",
+            group_id, digest_key(content_hash)
+        ) is not None
+
+    async def filter_new(self, feed_group, feed_url, candidates):
+        """批量去重：返回未出现过的 (entry_id, content_hash)
+
+        条目标识按 (group_id, feed_id, entry_key) 主键、内容哈希按 idx_entry_status_content 查，
+        整源一次查询（超长时分块），不必逐条查询或把整张状态表读进内存。
+        """
+        if not candidates:
+            return []
+        group_ids = await self._ids(feed_group, None, create=False)
+        if group_ids is None:
+            return list(candidates)
+        group_id = group_ids[0]
+        feed_id = self._feed_ids.get(feed_url)
+        if feed_id is None:
+            ids = await self._ids(feed_group, feed_url, create=False)
+            feed_id = ids[1] if ids else -1  # 新源：只按内容哈希去重
+        keyed = [(digest_key(entry_id), digest_key(content_hash)) for entry_id, content_hash in candidates]
+        rows = []
+        step = SQLITE_MAX_PARAMS // 2
+        for i in range(0, len(keyed), step):
+            chunk = keyed[i:i + step]
+            rows.extend(await self.engine.fetch(f"""
+                SELECT 'h' AS kind, content_key AS value FROM entry_status
+                WHERE group_id=$1 AND content_key IN ({placeholders(3, len(chunk))})
+                UNION ALL
+                SELECT 'u' AS kind, entry_key AS value FROM entry_status
+                WHERE group_id=$1 AND feed_id=$2 AND entry_key IN ({placeholders(3 + len(chunk), len(chunk))})
+            """, group_id, feed_id, *(h for _, h in chunk), *(e for e, _ in chunk)))
+        seen_hashes = {bytes(row['value']) for row in rows if row['kind'] == 'h'}
+        seen_ids = {bytes(row['value']) for row in rows if row['kind'] == 'u'}
+        return [
+            candidate for candidate, (entry_key, content_key) in zip(candidates, keyed)
+            if content_key not in seen_hashes and entry_key not in seen_ids
+        ]
+
+    # ---------- 发送队列 ----------
+
+    QUEUE_INSERT = """
+        INSERT INTO send_queue (feed_group, chat_id, text, disable_preview, created_time)
+        VALUES ($1, $2, $3, $4, $5)
+    """
+
+    def split_text(self, text):
+        """单条消息的分段规则，默认不分段；rss.py 按 Telegram 长度上限重写"""
+        return [text]
+
+    def _queue_rows(self, feed_group, chat_id, message, disable_preview):
+        """把消息（字符串或分段列表）切成单条消息，生成 send_queue 行"""
+        segments = message if isinstance(message, list) else [message]
+        now = time.time()
+        return [
+            (feed_group, str(chat_id), chunk, int(bool(disable_preview)), now)
+            for segment in segments if segment.strip()
+            for chunk in self.split_text(segment)
+        ]
+
+    async def enqueue_messages(self, feed_group, chat_id, message, disable_preview, sent_entry_ids=None, feed_url=None):
+        """写入发送队列；同一事务内把 sent_entry_ids 对应的待发送消息标记为已发送（移交给队列）
+
+        标记只作用于 sent=0 的行：若其中有行已被其他实例移交，整个事务回滚并抛出
+        HandoffConflict，保证同一批待发送消息只入队一次。
+        """
+        queue_rows = self._queue_rows(feed_group, chat_id, message, disable_preview)
+        entry_ids = list(dict.fromkeys(sent_entry_ids or []))
+        feed_clause = "AND feed_url=$2" if feed_url is not None else ""
+        params = (feed_group, feed_url) if feed_url is not None else (feed_group,)
+        async with self.engine.transaction(immediate=True) as db:
+            claimed = set()
+            for i in range(0, len(entry_ids), SQLITE_MAX_PARAMS):
+                chunk = entry_ids[i:i + SQLITE_MAX_PARAMS]
+                where = f"""
+                    WHERE feed_group=$1 {feed_clause} AND sent=0
+                    AND entry_id IN ({placeholders(len(params) + 1, len(chunk))})
+                """
+                if self.engine.dialect == "pg":
+                    rows = await db.fetch(f"UPDATE pending_messages SET sent=1 {where} RETURNING entry_id", *params, *chunk)
+                else:
+                    # 3.35 以前的 SQLite 不支持 RETURNING：写锁内先查后改
+                    rows = await db.fetch(f"SELECT entry_id FROM pending_messages {where}", *params, *chunk)
+                    await db.execute(f"UPDATE pending_messages SET sent=1 {where}", *params, *chunk)
+                claimed.update(row["entry_id"] for row in rows)
+            if len(claimed) < len(entry_ids):
+                raise HandoffConflict()
+            if queue_rows:
+                await db.executemany(self.QUEUE_INSERT, queue_rows)
+
+    async def claim_queued_messages(self, feed_group, owner, limit=SEND_CLAIM_BATCH, lease=SEND_CLAIM_LEASE):
+        """认领组内最早的一批未认领（或租约已过期）的队列消息，按 id 顺序返回
+
+        PG 用 FOR UPDATE SKIP LOCKED，多个实例同时认领互不阻塞、互不重复；
+        SQLite 在 BEGIN IMMEDIATE 事务内先查询再更新，写锁保证同一批不会被重复认领
+        （不用 UPDATE ... RETURNING，兼容 3.35 以前的 SQLite）。
+        """
+        now = time.time()
+        if self.engine.dialect == "pg":
+            rows = await self.engine.fetch("""
+                UPDATE send_queue SET claim_owner=$2, claim_expires=$3
+                WHERE id IN (
+                    SELECT id FROM send_queue
+                    WHERE feed_group=$1 AND (claim_owner IS NULL OR claim_expires < $4)
+                    ORDER BY id LIMIT $5
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, chat_id, text, disable_preview
+            """, feed_group, owner, now + lease, now, limit)
+            # RETURNING 不保证顺序
+            rows.sort(key=lambda row: row["id"])
+            return rows
+        async with self.engine.transaction(immediate=True) as db:
+            rows = await db.fetch("""
+                SELECT id, chat_id, text, disable_preview FROM send_queue
+                WHERE feed_group=$1 AND (claim_owner IS NULL OR claim_expires < $2)
+                ORDER BY id LIMIT $3
+            """, feed_group, now, limit)
+            ids = [row["id"] for row in rows]
+            for i in range(0, len(ids), SQLITE_MAX_PARAMS):
+                chunk = ids[i:i + SQLITE_MAX_PARAMS]
+                await db.execute(f"""
+                    UPDATE send_queue SET claim_owner=$1, claim_expires=$2
+                    WHERE id IN ({placeholders(3, len(chunk))})
+                """, owner, now + lease, *chunk)
+        return rows
+
+    async def has_queued_messages(self, feed_group):
+        """组内是否有可认领的队列消息（只读查询，队列为空时不加写锁）"""
+        return await self.engine.fetchval("""
+            SELECT 1 FROM send_queue
+            WHERE feed_group=$1 AND (claim_owner IS NULL OR claim_expires < $2)
+            LIMIT 1
+        """, feed_group, time.time()) is not None
+
+    async def release_queued_messages(self, feed_group, owner):
+        """释放本实例在该组持有的认领，未发送的消息立即可被重新认领"""
+        await self.engine.execute("""
+            UPDATE send_queue SET claim_owner=NULL, claim_expires=0
+            WHERE feed_group=$1 AND claim_owner=$2
+        """, feed_group, owner)
+
+    async def delete_queued_message(self, message_id, owner):
+        """发送成功后删除消息；只删除仍由本实例认领的行"""
+        await self.engine.execute("DELETE FROM send_queue WHERE id=$1 AND claim_owner=$2", message_id, owner)
+
+    # ---------- 历史清理 ----------
+
+    async def _delete_status(self, db, feed_group, cutoff_ts):
+        await db.execute("""
+            DELETE FROM entry_status WHERE entry_timestamp<$2
+            AND group_id=(SELECT id FROM feed_groups WHERE name=$1)
+        """, feed_group, cutoff_ts)
+
+    async def run_cleanup(self, cleanup_key, delete):
+        """每个 cleanup_key 每天最多执行一次 delete(db, now)，与清理时间戳在同一事务内提交"""
+        now = time.time()
+        last_cleanup = await self._get_timestamp("cleanup_timestamps", "last_cleanup_time", cleanup_key)
+        if now - last_cleanup < CLEANUP_INTERVAL:
+            return
+        async with self.engine.transaction() as db:
+            await delete(db, now)
+            await self._save_timestamp("cleanup_timestamps", "last_cleanup_time", cleanup_key, now, db=db)
+
+    async def cleanup_history(self, days, feed_group):
+        async def delete(db, now):
+            cutoff_ts = now - days * 86400
+            await self._delete_status(db, feed_group, cutoff_ts)
+            # 已发送的待发送消息按同样的保留天数清除
+            await db.execute(
+                "DELETE FROM pending_messages WHERE feed_group=$1 AND sent=1 AND entry_timestamp<$2",
+                feed_group, cutoff_ts
+            )
+        await self.run_cleanup(feed_group, delete)
+
+
+# ========== 内存存储 ==========
+
+class MemoryStore:
+    """字典实现的 RSSStore，进程内有效，供基准和离线调试使用；语义与 SQLStore 的 SQLite 实现一致"""
+
+    def __init__(self):
+        self.status = {}        # (feed_group, feed_url, entry_url) -> (content_hash, timestamp)
+        self.hashes = {}        # (feed_group, content_hash) -> (feed_url, entry_url)
+        self.pending = {}       # (feed_group, feed_url, entry_id) -> 行
+        self.queue = {}         # id -> send_queue 行
+        self.run_times = {}
+        self.batch_times = {}
+        self.cleanup_times = {}
+        self._queue_ids = itertools.count(1)
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def ensure_initialized(self):
+        pass
+
+    async def load_last_run_time(self, feed_group):
+        return self.run_times.get(feed_group, 0)
+
+    async def save_last_run_time(self, feed_group, last_run_time):
+        self.run_times[feed_group] = last_run_time
+
+    async def get_last_batch_sent_time(self, feed_group):
+        return self.batch_times.get(feed_group, 0)
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        self.batch_times[feed_group] = ts
+
+    # ---------- 待发送消息 ----------
+
+    def _add_pending(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
+        self.pending.setdefault((feed_group, feed_url, entry_id), {
+            "feed_url": feed_url, "entry_id": entry_id, "content_hash": content_hash,
+            "title": title, "translated_title": translated_title, "link": link, "summary": summary,
+            "entry_timestamp": timestamp, "feed_title": feed_title, "sent": 0,
+        })
+
+    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
+        self._add_pending(feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title)
+
+    async def iter_pending_messages(self, feed_group, chunk_size=PENDING_CHUNK_SIZE):
+        rows = sorted(
+            (row for (group, _, _), row in self.pending.items() if group == feed_group and not row["sent"]),
+            key=lambda row: (row["feed_url"], row["entry_timestamp"], row["entry_id"])
+        )
+        for i in range(0, len(rows), chunk_size):
+            yield [{key: row[key] for key in SQLStore.PENDING_COLUMNS} for row in rows[i:i + chunk_size]]
+
+    async def get_pending_messages(self, feed_group):
+        pending = []
+        async for rows in self.iter_pending_messages(feed_group):
+            pending.extend(rows)
+        return pending
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        ids = set(ids or ())
+        for (group, _, entry_id), row in self.pending.items():
+            if group == feed_group and entry_id in ids:
+                row["sent"] = 1
+
+    # ---------- 状态记录 ----------
+
+    def _save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
+        # 与 SQLite 的 REPLACE 一致：同组相同内容哈希的旧记录被覆盖
+        owner = self.hashes.get((feed_group, entry_content_hash))
+        if entry_content_hash is not None and owner and owner != (feed_url, entry_url):
+            self.status.pop((feed_group, *owner), None)
+        previous = self.status.get((feed_group, feed_url, entry_url))
+        if previous and previous[0] != entry_content_hash:
+            self.hashes.pop((feed_group, previous[0]), None)
+        self.status[(feed_group, feed_url, entry_url)] = (entry_content_hash, timestamp)
+        if entry_content_hash is not None:
+            self.hashes[(feed_group, entry_content_hash)] = (feed_url, entry_url)
+
+    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
+        self._save_status(feed_group, feed_url, entry_url, entry_content_hash, timestamp)
+
+    async def record_entries(self, feed_group, feed_url, statuses, pending=None, outbox=None):
+        if not statuses and not pending:
+            return
+        for row in pending or ():
+            self._add_pending(feed_group, feed_url, *row)
+        for entry_url, content_hash, ts in statuses or ():
+            self._save_status(feed_group, feed_url, entry_url, content_hash, ts)
+        if outbox:
+            self._enqueue(feed_group, *outbox)
+
+    async def has_content_hash(self, feed_group, content_hash):
+        return (feed_group, content_hash) in self.hashes
+
+    async def filter_new(self, feed_group, feed_url, candidates):
+        return [
+            (entry_id, content_hash) for entry_id, content_hash in candidates
+            if (feed_group, content_hash) not in self.hashes
+            and (feed_group, feed_url, entry_id) not in self.status
+        ]
+
+    # ---------- 发送队列 ----------
+
+    split_text = SQLStore.split_text
+
+    def _enqueue(self, feed_group, chat_id, message, disable_preview):
+        segments = message if isinstance(message, list) else [message]
+        now = time.time()
+        for segment in segments:
+            if not segment.strip():
+                continue
+            for chunk in self.split_text(segment):
+                message_id = next(self._queue_ids)
+                self.queue[message_id] = {
+                    "id": message_id, "feed_group": feed_group, "chat_id": str(chat_id), "text": chunk,
+                    "disable_preview": int(bool(disable_preview)), "created_time": now,
+                    "claim_owner": None, "claim_expires": 0,
+                }
+
+    async def enqueue_messages(self, feed_group, chat_id, message, disable_preview, sent_entry_ids=None, feed_url=None):
+        entry_ids = set(sent_entry_ids or ())
+        rows = [
+            row for (group, url, entry_id), row in self.pending.items()
+            if group == feed_group and (feed_url is None or url == feed_url)
+            and entry_id in entry_ids and not row["sent"]
+        ]
+        if len({row["entry_id"] for row in rows}) < len(entry_ids):
+            raise HandoffConflict()
+        for row in rows:
+            row["sent"] = 1
+        self._enqueue(feed_group, chat_id, message, disable_preview)
+
+    def _claimable(self, feed_group, now):
+        return [
+            row for row in self.queue.values()
+            if row["feed_group"] == feed_group and (row["claim_owner"] is None or row["claim_expires"] < now)
+        ]
+
+    async def claim_queued_messages(self, feed_group, owner, limit=SEND_CLAIM_BATCH, lease=SEND_CLAIM_LEASE):
+        now = time.time()
+        rows = sorted(self._claimable(feed_group, now), key=lambda row: row["id"])[:limit]
+        for row in rows:
+            row["claim_owner"], row["claim_expires"] = owner, now + lease
+        return [{key: row[key] for key in ("id", "chat_id", "text", "disable_preview")} for row in rows]
+
+    async def has_queued_messages(self, feed_group):
+        return bool(self._claimable(feed_group, time.time()))
+
+    async def release_queued_messages(self, feed_group, owner):
+        for row in self.queue.values():
+            if row["feed_group"] == feed_group and row["claim_owner"] == owner:
+                row["claim_owner"], row["claim_expires"] = None, 0
+
+    async def delete_queued_message(self, message_id, owner):
+        row = self.queue.get(message_id)
+        if row and row["claim_owner"] == owner:
+            del self.queue[message_id]
+
+    # ---------- 历史清理 ----------
+
+    async def cleanup_history(self, days, feed_group):
+        now = time.time()
+        if now - self.cleanup_times.get(feed_group, 0) < CLEANUP_INTERVAL:
+            return
+        cutoff_ts = now - days * 86400
+        for key, (content_hash, ts) in list(self.status.items()):
+            if key[0] == feed_group and ts < cutoff_ts:
+                del self.status[key]
+                self.hashes.pop((feed_group, content_hash), None)
+        for key, row in list(self.pending.items()):
+            if key[0] == feed_group and row["sent"] and row["entry_timestamp"] < cutoff_ts:
+                del self.pending[key]
+        self.cleanup_times[feed_group] = now
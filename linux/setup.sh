@@ -34,6 +34,10 @@ echo "[7/10] 设置定时任务"
 #(crontab -l | grep -q '~/rss/rss.py') || (crontab -l; echo "*/10 * * * * /bin/bash ~/rss/rss.sh") | crontab -
 #(crontab -l | grep -q '~/rss/rss.py') || (crontab -l; echo "0,10,20,30,40,50 * * * * /bin/bash ~/rss/rss.sh") | crontab -
 #(crontab -l | grep -q '~/rss/rss.py') || (crontab -l; echo "5,15,25,35,45,55 * * * * /bin/bash ~/rss/rss.sh") | crontab -
+# 常驻模式（与上面的 cron 方式二选一）：开机启动 rss.py --daemon
+#(crontab -l | grep -q 'rss.sh --daemon') || (crontab -l; echo "@reboot /bin/bash ~/rss/rss.sh --daemon") | crontab -
+# 使用 PG 时可配合 cron 采集开机启动批量推送进程 rss.py --flusher（LISTEN/NOTIFY 准时推送）
+#(crontab -l | grep -q 'rss.sh --flusher') || (crontab -l; echo "@reboot /bin/bash ~/rss/rss.sh --flusher") | crontab -
 #(crontab -l | grep -q '~/rss/call.py') || (crontab -l; echo "20 10 * * * /bin/bash ~/rss/call.sh") | crontab -
 #(crontab -l | grep -q '~/rss/usa.py') || (crontab -l; echo "30 06,15,23 * * 1-5 /bin/bash ~/rss/usd.sh") | crontab -
 #(crontab -l | grep -q '~/rss/usa.py') || (crontab -l; echo "30 06 * * 6-7 /bin/bash ~/rss/usd.sh") | crontab -
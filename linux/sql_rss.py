@@ -8,7 +8,6 @@ import pytz
 import fcntl
 import time
 import signal
-import aiosqlite
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -19,13 +18,12 @@ from telegram.error import BadRequest
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+import tmt_service
+import textnorm
+import rss_store
+import lang_detect
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
 from collections import defaultdict
-from langdetect import detect, LangDetectException
 
 # ========== 全局退出标志 ==========
 SHOULD_EXIT = False
@@ -425,354 +423,17 @@ else:
     logger.info(f"🔧 使用 SQLite 数据库: {DATABASE_FILE}")
     print(f"✅ SQLite : {DATABASE_FILE}")
 
-if USE_PG:
-    import asyncpg
-class RSSDatabase:
-    def __init__(self, loop=None):
-        self.loop = loop or asyncio.get_event_loop()
-        self.conn = None
-        self.pg_pool = None
-
-    async def open(self):
-        if USE_PG:
-            self.pg_pool = await asyncpg.create_pool(PG_URL)
-        else:
-            self.conn = await aiosqlite.connect(DATABASE_FILE)
-
-    async def close(self):
-        if USE_PG and self.pg_pool:
-            await self.pg_pool.close()
-        elif self.conn:
-            await self.conn.close()
-
-    async def ensure_initialized(self):
-        """确保数据库表已创建"""
-        await self.create_tables()
-
-    async def create_tables(self):  # 这里缩进修复
-        """改进的建表语句，确保 PostgreSQL 和 SQLite 索引一致"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 主表
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    );
-                """)
-                # 确保内容哈希索引存在
-                await conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time DOUBLE PRECISION
-                    );
-                """)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp REAL,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    )""")
-                await c.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp REAL,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    )
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time REAL
-                    )
-                """)
-                await self.conn.commit()
-
-    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10)
-                ON CONFLICT DO NOTHING
-                """, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR IGNORE INTO pending_messages
-                    (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                """, (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title))
-                await self.conn.commit()
-
-    async def get_pending_messages(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=$1 AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, feed_group)
-                return [dict(row) for row in rows]
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=? AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, (feed_group,))
-                keys = [d[0] for d in c.description]
-                rows = await c.fetchall()
-                return [dict(zip(keys, row)) for row in rows]
-
-    async def mark_pending_as_sent(self, feed_group, ids):
-        if not ids:
-            return
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=$1 AND entry_id=$2
-                """, [(feed_group, eid) for eid in ids])
-        else:
-            async with self.conn.cursor() as c:
-                await c.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=? AND entry_id=?
-                """, [(feed_group, eid) for eid in ids])
-                await self.conn.commit()
-
-    async def get_last_batch_sent_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1
-                """, feed_group)
-                return row['last_batch_sent_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?
-                """, (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_batch_sent_time(self, feed_group, ts):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO batch_timestamps (feed_group, last_batch_sent_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
-                """, feed_group, ts)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time)
-                    VALUES (?, ?)
-                """, (feed_group, ts))
-                await self.conn.commit()
-
-    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
-        """改进的状态保存，确保去重一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 使用 ON CONFLICT 确保唯一性
-                await conn.execute("""
-                    INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) 
-                    VALUES($1, $2, $3, $4, $5) 
-                    ON CONFLICT (feed_group, feed_url, entry_url) 
-                    DO UPDATE SET 
-                        entry_content_hash = EXCLUDED.entry_content_hash,
-                        entry_timestamp = EXCLUDED.entry_timestamp
-                """, feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "INSERT OR REPLACE INTO rss_status VALUES (?, ?, ?, ?, ?)",
-                    (feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-                )
-                await self.conn.commit()
-
-    async def has_content_hash(self, feed_group, content_hash):
-        """改进的内容哈希检查，确保编码一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 修复：PostgreSQL 参数占位符错误，应该是 $1, $2
-                row = await conn.fetchrow(
-                    "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
-                    feed_group, content_hash
-                )
-                return row is not None
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
-                    (feed_group, content_hash)
-                )
-                return await c.fetchone() is not None
-
-    async def load_status(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for row in rows:
-                    feed_url, entry_url = row['feed_url'], row['entry_url']
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT feed_url, entry_url FROM rss_status")
-                rows = await c.fetchall()
-                status = {}
-                for feed_url, entry_url in rows:
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-
-    async def load_last_run_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
-                return row['last_run_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
+class RSSDatabase(rss_store.SQLStore):
+    """按 PG_URL 选择 PostgreSQL / SQLite 引擎，表结构与读写均由 rss_store 提供"""
 
-    async def save_last_run_time(self, feed_group, last_run_time):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO timestamps (feed_group, last_run_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
-                """, feed_group, last_run_time)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                    VALUES (?, ?)
-                """, (feed_group, last_run_time))
-                await self.conn.commit()
+    def __init__(self, loop=None):
+        super().__init__(rss_store.create_engine(PG_URL, DATABASE_FILE))
 
-    async def cleanup_history(self, days, feed_group):
-        now = time.time()
-        cutoff_ts = now - days * 86400
-
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
-                )
-                last_cleanup = row['last_cleanup_time'] if row else 0
-                if now - last_cleanup < 86400:
-                    return
-                await conn.execute(
-                    "DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2",
-                    feed_group, cutoff_ts
-                )
-                await conn.execute("""
-                    INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES ($1, $2)
-                    ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
-                """, feed_group, now)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?",
-                    (feed_group,)
-                )
-                result = await c.fetchone()
-                last_cleanup = result[0] if result else 0
-                if now - last_cleanup < 86400:
-                    return
-                await c.execute(
-                    "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                    (feed_group, cutoff_ts)
-                )
-                await c.execute("""
-                    INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES (?, ?)
-                """, (feed_group, now))
-                await self.conn.commit()
 
 # ========== 业务逻辑 ==========
 
 def remove_html_tags(text):
-    text = re.sub(r'<[^>]+>', '', text)
-    text = re.sub(r'#([^#\s]+)#', r'\1', text)
-    text = re.sub(r'#\w+', '', text)
-    text = re.sub(r'@[^\s]+', '', text).strip()
-    text = re.sub(r'【\s*】', '', text)
-    text = re.sub(r'(?<!\S)#(?!\S)', '', text)
-    text = re.sub(r'(?<!\S)：(?!\S)', '', text)
-    return text
+    return textnorm.clean_text(text)
 
 def get_entry_identifier(entry):
     if hasattr(entry, 'guid') and entry.guid:
@@ -897,7 +558,6 @@ async def fetch_feed(session, feed_url):
     return None, canonical_url
 
 async def translate_with_credentials(secret_id, secret_key, text):
-    loop = asyncio.get_running_loop()
     text_bytes = text.encode('utf-8')
     if len(text_bytes) > 2000:
         safe_bytes = text_bytes[:2000]
@@ -906,21 +566,14 @@ async def translate_with_credentials(secret_id, secret_key, text):
         text = safe_bytes.decode('utf-8', errors='ignore')
      #   logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
     try:
-        return await loop.run_in_executor(
-            None, 
-            lambda: _sync_translate(secret_id, secret_key, text)
-        )
+        return await tmt_service.run_sync(_sync_translate, secret_id, secret_key, text)
     except Exception as e:
     #    logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
         raise
 
 def is_need_translate(text):
-    try:
-        lang = detect(text)
-        # 只对英文、日文、韩文、阿拉伯文等非中文做翻译
-        return lang not in ("zh-cn", "zh-tw", "zh", "yue")
-    except LangDetectException:
-        return False
+    # 只对英文、日文、韩文、阿拉伯文等非中文做翻译；没有文字（纯数字/符号）时不翻译
+    return lang_detect.detect_language(text) not in ("zh", "unknown")
     
 def is_mostly_symbols(text):
     """检查文本是否主要由符号、数字组成"""
@@ -936,15 +589,7 @@ def is_mostly_symbols(text):
 
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        return tmt_service.translate_text(secret_id, secret_key, TENCENT_REGION, remove_html_tags(text))
     except TencentCloudSDKException as e:
         error_details = {
             "code": getattr(e, "code", ""),
@@ -1251,7 +896,7 @@ async def process_batch_send(group, db: RSSDatabase):
     await db.save_last_batch_sent_time(group_key, now)
 
 # ========== 组采集（采集但可选择是否立即推送） ==========
-async def process_group(session, group_config, global_status, db: RSSDatabase):
+async def process_group(session, group_config, db: RSSDatabase):
     """在组处理中添加退出检查"""
     global SHOULD_EXIT
     
@@ -1281,20 +926,25 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                 if not feed_data or not feed_data.entries:
                     continue
                     
-                processed_ids = global_status.get(canonical_url, set())
                 new_entries = []
                 seen_in_batch = set()
                 new_hashes_in_batch = set()  # 当前批次的内容哈希去重
 
-                for entry in feed_data.entries:
-                    entry_id = get_entry_identifier(entry)
-                    content_hash = get_entry_content_hash(entry)
-                    
-                    # 统一使用内容哈希去重（主要修复）
-                    if await db.has_content_hash(group_key, content_hash):
+                candidates = [
+                    (entry, get_entry_identifier(entry), get_entry_content_hash(entry))
+                    for entry in feed_data.entries
+                ]
+                # 条目标识 + 内容哈希去重（整源一次查询）
+                unseen = set(await db.filter_new(
+                    group_key, canonical_url,
+                    [(entry_id, content_hash) for _, entry_id, content_hash in candidates]
+                ))
+
+                for entry, entry_id, content_hash in candidates:
+                    if (entry_id, content_hash) not in unseen:
                         continue
                         
-                    if entry_id in processed_ids or entry_id in seen_in_batch:
+                    if entry_id in seen_in_batch:
                         continue
                         
                     # 在当前批次中也用内容哈希去重
@@ -1311,7 +961,9 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                     
                 if new_entries:
                     if batch_send_interval:
-                        # 批量发送模式：存入待发送队列
+                        # 批量发送模式：存入待发送队列（整源一个事务）
+                        pending_rows = []
+                        status_rows = []
                         for entry, content_hash, entry_id in new_entries:
                             raw_subject = remove_html_tags(getattr(entry, "title", "") or "")
                             if processor["translate"] and is_need_translate(raw_subject):
@@ -1319,9 +971,7 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                             else:
                                 translated_subject = raw_subject
                                 
-                            await db.add_pending_message(
-                                group_key, 
-                                canonical_url, 
+                            pending_rows.append((
                                 entry_id, 
                                 content_hash,
                                 getattr(entry, "title", ""), 
@@ -1330,11 +980,10 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                                 getattr(entry, "summary", ""),
                                 get_entry_timestamp(entry).timestamp() if get_entry_timestamp(entry) else time.time(),
                                 feed_data.feed.get('title', "") 
-                            )
-                            await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                            processed_ids.add(entry_id)
-                            
-                        global_status[canonical_url] = processed_ids
+                            ))
+                            status_rows.append((entry_id, content_hash, time.time()))
+
+                        await db.record_entries(group_key, canonical_url, status_rows, pending_rows)
                     else:
                         # 立即发送模式
                         feed_message = await generate_group_message(feed_data, [e for e,_,_ in new_entries], processor)
@@ -1346,10 +995,11 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                                     feed_message,
                                     disable_web_page_preview=not processor.get("preview", True)
                                 )
-                                for entry, content_hash, entry_id in new_entries:
-                                    await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                    processed_ids.add(entry_id)
-                                global_status[canonical_url] = processed_ids
+                                await db.record_entries(
+                                    group_key,
+                                    canonical_url,
+                                    [(entry_id, content_hash, time.time()) for _, content_hash, entry_id in new_entries]
+                                )
                             except Exception as send_error:
                                 logger.error(f"❌ 发送消息失败 [{feed_url}]: {send_error}")
                                 raise
@@ -1432,13 +1082,12 @@ async def run_main_logic():
         # 主处理逻辑
         logger.info("🚀 开始处理 RSS 订阅...")
         async with aiohttp.ClientSession() as session:
-            status = await db.load_status()
             tasks = []
             
             for group in RSS_GROUPS:
                 try:
                     task = asyncio.create_task(
-                        process_group(session, group, status, db)
+                        process_group(session, group, db)
                     )
                     tasks.append(task)
                 except Exception as e:
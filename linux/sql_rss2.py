@@ -1,7 +1,6 @@
 import asyncio
 import aiohttp
 import logging
-import re
 import os
 import hashlib
 import pytz
@@ -18,10 +17,9 @@ from telegram.error import BadRequest
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+import tmt_service
+import textnorm
+import rss_store
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
 
 # ========== 环境加载 ==========
@@ -362,363 +360,18 @@ RSS_GROUPS = [ # RSS 组配置列表
 
 USE_PG = os.getenv("PG_URL") is not None
 PG_URL = os.getenv("PG_URL")
-if USE_PG:
-    import asyncpg
 
-class RSSDatabase:
-    def __init__(self, loop=None):
-        self.loop = loop or asyncio.get_event_loop()
-        self.conn = None
-        self.pg_pool = None
-
-    async def open(self):
-        if USE_PG:
-            self.pg_pool = await asyncpg.create_pool(PG_URL)
-        else:
-            import sqlite3
-            self.conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
-
-    async def close(self):
-        if USE_PG and self.pg_pool:
-            await self.pg_pool.close()
-        elif self.conn:
-            self.conn.close()
-
-    async def create_tables(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                CREATE TABLE IF NOT EXISTS rss_status (
-                    feed_group TEXT,
-                    feed_url TEXT,
-                    entry_url TEXT,
-                    entry_content_hash TEXT,
-                    entry_timestamp DOUBLE PRECISION,
-                    PRIMARY KEY (feed_group, feed_url, entry_url)
-                );
-                """)
-                await conn.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash
-                ON rss_status(feed_group, entry_content_hash);
-                """)
-                await conn.execute("""
-                CREATE TABLE IF NOT EXISTS timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_run_time DOUBLE PRECISION
-                );
-                """)
-                await conn.execute("""
-                CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_cleanup_time DOUBLE PRECISION
-                );
-                """)
-                await conn.execute("""
-                CREATE TABLE IF NOT EXISTS pending_messages (
-                    feed_group TEXT,
-                    feed_url TEXT,
-                    entry_id TEXT,
-                    content_hash TEXT,
-                    title TEXT,
-                    translated_title TEXT,
-                    link TEXT,
-                    summary TEXT,
-                    entry_timestamp DOUBLE PRECISION,
-                    sent INTEGER DEFAULT 0,
-                    PRIMARY KEY (feed_group, feed_url, entry_id)
-                );
-                """)
-                await conn.execute("""
-                CREATE TABLE IF NOT EXISTS batch_timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_batch_sent_time DOUBLE PRECISION
-                );
-                """)
-        else:
-            def _create():
-                c = self.conn.cursor()
-                c.execute("""
-                CREATE TABLE IF NOT EXISTS rss_status (
-                    feed_group TEXT,
-                    feed_url TEXT,
-                    entry_url TEXT,
-                    entry_content_hash TEXT,
-                    entry_timestamp REAL,
-                    PRIMARY KEY (feed_group, feed_url, entry_url)
-                )""")
-                c.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash
-                ON rss_status(feed_group, entry_content_hash);
-                """)
-                c.execute("""
-                CREATE TABLE IF NOT EXISTS timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_run_time REAL
-                )""")
-                c.execute("""
-                CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_cleanup_time REAL
-                )""")
-                c.execute("""
-                CREATE TABLE IF NOT EXISTS pending_messages (
-                    feed_group TEXT,
-                    feed_url TEXT,
-                    entry_id TEXT,
-                    content_hash TEXT,
-                    title TEXT,
-                    translated_title TEXT,
-                    link TEXT,
-                    summary TEXT,
-                    entry_timestamp REAL,
-                    sent INTEGER DEFAULT 0,
-                    PRIMARY KEY (feed_group, feed_url, entry_id)
-                )
-                """)
-                c.execute("""
-                CREATE TABLE IF NOT EXISTS batch_timestamps (
-                    feed_group TEXT PRIMARY KEY,
-                    last_batch_sent_time REAL
-                )
-                """)
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _create)
-
-    # 待发消息操作
-    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0)
-                ON CONFLICT DO NOTHING
-                """, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp)
-        else:
-            def _add():
-                c = self.conn.cursor()
-                c.execute("""
-                    INSERT OR IGNORE INTO pending_messages
-                    (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                """, (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title))
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _add)
+class RSSDatabase(rss_store.SQLStore):
+    """按 PG_URL 选择 PostgreSQL / SQLite 引擎，表结构与读写均由 rss_store 提供"""
 
-    async def get_pending_messages(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=$1 AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, feed_group)
-                return [dict(row) for row in rows]
-        else:
-            def _get():
-                c = self.conn.cursor()
-                c.execute("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=? AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, (feed_group,))
-                keys = [d[0] for d in c.description]
-                return [dict(zip(keys, row)) for row in c.fetchall()]
-            return await self.loop.run_in_executor(None, _get)
-
-    async def mark_pending_as_sent(self, feed_group, ids):
-        if not ids:
-            return
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=$1 AND entry_id=$2
-                """, [(feed_group, eid) for eid in ids])
-        else:
-            def _mark():
-                c = self.conn.cursor()
-                c.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=? AND entry_id=?
-                """, [(feed_group, eid) for eid in ids])
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _mark)
-
-    async def get_last_batch_sent_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1
-                """, feed_group)
-                return row['last_batch_sent_time'] if row else 0
-        else:
-            def _get():
-                c = self.conn.cursor()
-                c.execute("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?
-                """, (feed_group,))
-                result = c.fetchone()
-                return result[0] if result else 0
-            return await self.loop.run_in_executor(None, _get)
-
-    async def save_last_batch_sent_time(self, feed_group, ts):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO batch_timestamps (feed_group, last_batch_sent_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
-                """, feed_group, ts)
-        else:
-            def _save():
-                c = self.conn.cursor()
-                c.execute("""
-                    INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time)
-                    VALUES (?, ?)
-                """, (feed_group, ts))
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _save)
-
-    # RSS状态操作
-    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute(
-                    "INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) "
-                    "VALUES($1, $2, $3, $4, $5) ON CONFLICT DO NOTHING",
-                    feed_group, feed_url, entry_url, entry_content_hash, timestamp
-                )
-        else:
-            def _save():
-                c = self.conn.cursor()
-                c.execute(
-                    "INSERT OR IGNORE INTO rss_status VALUES (?, ?, ?, ?, ?)",
-                    (feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-                )
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _save)
-
-    async def has_content_hash(self, feed_group, content_hash):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
-                    feed_group, content_hash
-                )
-                return row is not None
-        else:
-            def _has():
-                c = self.conn.cursor()
-                c.execute(
-                    "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
-                    (feed_group, content_hash)
-                )
-                return c.fetchone() is not None
-            return await self.loop.run_in_executor(None, _has)
-
-    async def load_status(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for row in rows:
-                    feed_url, entry_url = row['feed_url'], row['entry_url']
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-        else:
-            def _load():
-                c = self.conn.cursor()
-                c.execute("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for feed_url, entry_url in c.fetchall():
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-            return await self.loop.run_in_executor(None, _load)
-
-    async def load_last_run_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
-                return row['last_run_time'] if row else 0
-        else:
-            def _load():
-                c = self.conn.cursor()
-                c.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-                result = c.fetchone()
-                return result[0] if result else 0
-            return await self.loop.run_in_executor(None, _load)
-
-    async def save_last_run_time(self, feed_group, last_run_time):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO timestamps (feed_group, last_run_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
-                """, feed_group, last_run_time)
-        else:
-            def _save():
-                c = self.conn.cursor()
-                c.execute("""
-                    INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                    VALUES (?, ?)
-                """, (feed_group, last_run_time))
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _save)
+    def __init__(self, loop=None):
+        super().__init__(rss_store.create_engine(PG_URL, DATABASE_FILE))
 
-    async def cleanup_history(self, days, feed_group):
-        now = time.time()
-        cutoff_ts = now - days * 86400
 
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
-                )
-                last_cleanup = row['last_cleanup_time'] if row else 0
-                if now - last_cleanup < 86400:
-                    return
-                await conn.execute(
-                    "DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2",
-                    feed_group, cutoff_ts
-                )
-                await conn.execute("""
-                    INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES ($1, $2)
-                    ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
-                """, feed_group, now)
-        else:
-            def _cleanup():
-                c = self.conn.cursor()
-                c.execute(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?",
-                    (feed_group,)
-                )
-                result = c.fetchone()
-                last_cleanup = result[0] if result else 0
-                if now - last_cleanup < 86400:
-                    return
-                c.execute(
-                    "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                    (feed_group, cutoff_ts)
-                )
-                c.execute("""
-                    INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES (?, ?)
-                """, (feed_group, now))
-                self.conn.commit()
-            await self.loop.run_in_executor(None, _cleanup)
 # ========== 业务逻辑 ==========
 
 def remove_html_tags(text):
-    text = re.sub(r'<[^>]+>', '', text)
-    text = re.sub(r'#([^#\s]+)#', r'\1', text)
-    text = re.sub(r'#\w+', '', text)
-    text = re.sub(r'@[^\s]+', '', text).strip()
-    text = re.sub(r'【\s*】', '', text)
-    text = re.sub(r'(?<!\S)#(?!\S)', '', text)
-    text = re.sub(r'(?<!\S)：(?!\S)', '', text)
-    return text
+    return textnorm.clean_text(text)
 
 def get_entry_identifier(entry):
     if hasattr(entry, 'guid') and entry.guid:
@@ -829,7 +482,6 @@ async def fetch_feed(session, feed_url):
     return None, canonical_url
 
 async def translate_with_credentials(secret_id, secret_key, text):
-    loop = asyncio.get_running_loop()
     text_bytes = text.encode('utf-8')
     if len(text_bytes) > 2000:
         safe_bytes = text_bytes[:2000]
@@ -838,25 +490,14 @@ async def translate_with_credentials(secret_id, secret_key, text):
         text = safe_bytes.decode('utf-8', errors='ignore')
         logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
     try:
-        return await loop.run_in_executor(
-            None, 
-            lambda: _sync_translate(secret_id, secret_key, text)
-        )
+        return await tmt_service.run_sync(_sync_translate, secret_id, secret_key, text)
     except Exception as e:
         logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
         raise
 
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        return tmt_service.translate_text(secret_id, secret_key, TENCENT_REGION, remove_html_tags(text))
     except TencentCloudSDKException as e:
         error_details = {
             "code": getattr(e, "code", ""),
@@ -993,7 +634,7 @@ async def process_batch_send(group, db: RSSDatabase):
     await db.save_last_batch_sent_time(group_key, now)
 
 # ========== 组采集（采集但可选择是否立即推送） ==========
-async def process_group(session, group_config, global_status, db: RSSDatabase):
+async def process_group(session, group_config, db: RSSDatabase):
     group_name = group_config["name"]
     group_key = group_config["group_key"]
     processor = group_config["processor"]
@@ -1012,15 +653,21 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                 feed_data, canonical_url = await fetch_feed(session, feed_url)
                 if not feed_data or not feed_data.entries:
                     continue
-                processed_ids = global_status.get(canonical_url, set())
                 new_entries = []
                 seen_in_batch = set()
-                for entry in feed_data.entries:
-                    entry_id = get_entry_identifier(entry)
-                    content_hash = get_entry_content_hash(entry)
-                    if await db.has_content_hash(group_key, content_hash):
+                candidates = [
+                    (entry, get_entry_identifier(entry), get_entry_content_hash(entry))
+                    for entry in feed_data.entries
+                ]
+                # 条目标识 + 内容哈希去重（整源一次查询）
+                unseen = set(await db.filter_new(
+                    group_key, canonical_url,
+                    [(entry_id, content_hash) for _, entry_id, content_hash in candidates]
+                ))
+                for entry, entry_id, content_hash in candidates:
+                    if (entry_id, content_hash) not in unseen:
                         continue
-                    if entry_id in processed_ids or entry_id in seen_in_batch:
+                    if entry_id in seen_in_batch:
                         continue
                     seen_in_batch.add(entry_id)
                     filter_config = processor.get("filter", {})
@@ -1037,21 +684,23 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                     new_entries.append((entry, content_hash, entry_id))
                 if new_entries:
                     if batch_send_interval:
+                        # 整源一个事务写入待发送消息和状态
+                        pending_rows = []
+                        status_rows = []
                         for entry, content_hash, entry_id in new_entries:
                             raw_subject = remove_html_tags(getattr(entry, "title", "") or "")
                             if processor["translate"]:
                                 translated_subject = await auto_translate_text(raw_subject)
                             else:
                                 translated_subject = raw_subject
-                            await db.add_pending_message(
-                                group_key, canonical_url, entry_id, content_hash,
+                            pending_rows.append((
+                                entry_id, content_hash,
                                 getattr(entry, "title", ""), translated_subject, getattr(entry, "link", ""), getattr(entry, "summary", ""),
                                 get_entry_timestamp(entry).timestamp() if get_entry_timestamp(entry) else time.time(),
                                 feed_data.feed.get('title', "") 
-                            )
-                            await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                            processed_ids.add(entry_id)
-                        global_status[canonical_url] = processed_ids
+                            ))
+                            status_rows.append((entry_id, content_hash, time.time()))
+                        await db.record_entries(group_key, canonical_url, status_rows, pending_rows)
                     else:
                         feed_message = await generate_group_message(feed_data, [e for e,_,_ in new_entries], processor)
                         if feed_message:
@@ -1062,10 +711,10 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                                     feed_message,
                                     disable_web_page_preview=not processor.get("preview", True)
                                 )
-                                for entry, content_hash, entry_id in new_entries:
-                                    await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                    processed_ids.add(entry_id)
-                                global_status[canonical_url] = processed_ids
+                                await db.record_entries(
+                                    group_key, canonical_url,
+                                    [(entry_id, content_hash, time.time()) for _, content_hash, entry_id in new_entries]
+                                )
                             except Exception as send_error:
                                 logger.error(f"❌ 发送消息失败 [{feed_url}]")
                                 raise
@@ -1101,11 +750,10 @@ async def main():
             logger.error(f"清理历史记录异常: 组={group['group_key']}, 错误={e}")
     async with aiohttp.ClientSession() as session:
         try:
-            status = await db.load_status()
             tasks = []
             for group in RSS_GROUPS:
                 try:
-                    tasks.append(process_group(session, group, status, db))
+                    tasks.append(process_group(session, group, db))
                 except Exception as e:
                     logger.error(f"⚠️ 创建任务失败 [{group['name']}]: {str(e)}")
             if tasks:
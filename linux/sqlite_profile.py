@@ -0,0 +1,67 @@
+"""SQLite 连接调优
+
+rss_store 的 SQLite 引擎（rss.py / sql_rss.py / sql_rss2.py / rss2.py）与 bench_sqlite.py 共用：
+- WAL 日志 + synchronous=NORMAL：提交只追加写 WAL、不再每次 fsync 主库，
+  读写互不阻塞，断电最多丢失最后几个事务，不会损坏数据库；
+- mmap / 页缓存 / 内存临时表减少读盘，语句缓存放大，按 SQL 文本复用预编译语句；
+- 关闭连接前执行 PRAGMA optimize，按本次连接的查询情况更新统计信息。
+"""
+import os
+import sqlite3
+
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 内存映射读取上限（字节）
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))        # 每个连接的页缓存（KiB）
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "10"))  # 等待其他进程释放写锁的超时（秒）
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))  # 每个连接缓存的预编译语句数
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+    f"PRAGMA cache_size=-{SQLITE_CACHE_KB}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def connect_kwargs():
+    """sqlite3.connect / aiosqlite.connect 的连接参数"""
+    return {"timeout": SQLITE_BUSY_TIMEOUT, "cached_statements": SQLITE_STATEMENT_CACHE}
+
+
+def connect(path, **kwargs):
+    """打开 sqlite3 连接并应用调优参数"""
+    conn = sqlite3.connect(path, **connect_kwargs(), **kwargs)
+    apply(conn)
+    return conn
+
+
+def apply(conn):
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+def close(conn):
+    """执行 PRAGMA optimize 后关闭 sqlite3 连接"""
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+
+async def connect_async(path, **kwargs):
+    """打开 aiosqlite 连接并应用调优参数"""
+    import aiosqlite
+    conn = await aiosqlite.connect(path, **connect_kwargs(), **kwargs)
+    for pragma in PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+
+async def close_async(conn):
+    """执行 PRAGMA optimize 后关闭 aiosqlite 连接"""
+    try:
+        await conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    await conn.close()
@@ -0,0 +1,48 @@
+"""标题 / 正文文本清洗
+
+rss.py / sql_rss.py / sql_rss2.py / rss2.py / mail.py 共用：
+- 正则在导入时预编译；
+- 不含任何需要处理的字符时直接 strip 返回，不跑正则；
+- clean_text 按 (文本, 是否去 HTML) 缓存结果，同一标题在采集、翻译、
+  生成消息时多次清洗只计算一次。
+"""
+import re
+from functools import lru_cache
+
+TEXTNORM_CACHE_SIZE = 4096
+
+TAG_RE = re.compile(r'<[^>]+>')
+LINE_TAG_RE = re.compile(r'<.*?>')              # mail.py 原有写法：不跨行，也匹配 <>
+HASHTAG_PAIR_RE = re.compile(r'#([^#\s]+)#')    # #文字# → 文字
+HASHTAG_RE = re.compile(r'#\w+')                # 移除 hashtags
+MENTION_RE = re.compile(r'@[^\s]+')             # 移除 @提及
+EMPTY_BRACKET_RE = re.compile(r'【\s*】')        # 移除 【】符号（含中间空格）
+LONE_HASH_RE = re.compile(r'(?<!\S)#(?!\S)')
+LONE_COLON_RE = re.compile(r'(?<!\S)：(?!\S)')
+
+# 各步骤会处理的字符；都不出现时清洗结果等于 text.strip()
+_SPECIAL_CHARS = frozenset('<#@【：')
+_SPECIAL_CHARS_NO_HTML = frozenset('#@【：')
+
+
+@lru_cache(maxsize=TEXTNORM_CACHE_SIZE)
+def clean_text(text, strip_html=True):
+    """去除 HTML 标签、话题标签、@提及和空的【】，结果与原先逐条 re.sub 一致"""
+    if _SPECIAL_CHARS.isdisjoint(text) if strip_html else _SPECIAL_CHARS_NO_HTML.isdisjoint(text):
+        return text.strip()
+    if strip_html:
+        text = TAG_RE.sub('', text)
+    text = HASHTAG_PAIR_RE.sub(r'\1', text)
+    text = HASHTAG_RE.sub('', text)
+    text = MENTION_RE.sub('', text).strip()
+    text = EMPTY_BRACKET_RE.sub('', text)
+    text = LONE_HASH_RE.sub('', text)
+    text = LONE_COLON_RE.sub('', text)
+    return text
+
+
+def strip_tags(text):
+    """只去除 HTML 标签，与 mail.py 原先的 re.sub('<.*?>', '', text) 一致（标签不跨行）"""
+    if '<' not in text:
+        return text
+    return LINE_TAG_RE.sub('', text)
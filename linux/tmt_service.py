@@ -0,0 +1,101 @@
+"""腾讯云机器翻译（TMT）共享客户端
+
+rss.py / sql_rss.py / sql_rss2.py / rss2.py / mail.py / qq.py 共用：
+- TmtClient 按 (secret_id, secret_key, region) 长期复用，开启 keep-alive，
+  每个工作线程各持有一份，避免 requests.Session 跨线程共享；
+- 翻译调用在专用的有界线程池中执行，不占用事件循环的默认执行器。
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tencentcloud.common import credential
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
+from tencentcloud.tmt.v20180321 import tmt_client, models
+
+TMT_ENDPOINT = "tmt.tencentcloudapi.com"
+TMT_MAX_WORKERS = int(os.getenv("TMT_MAX_WORKERS", "4"))    # 翻译线程池大小
+TMT_REQ_TIMEOUT = int(os.getenv("TMT_REQ_TIMEOUT", "30"))   # 单次请求超时（秒）
+TMT_BATCH_MAX_BYTES = int(os.getenv("TMT_BATCH_MAX_BYTES", "6000"))  # 批量翻译单次请求文本总字节上限
+
+_executor = ThreadPoolExecutor(max_workers=TMT_MAX_WORKERS, thread_name_prefix="tmt")
+_local = threading.local()
+
+
+def get_client(secret_id, secret_key, region):
+    """获取当前线程按凭据缓存的 TmtClient"""
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+    key = (secret_id, secret_key, region)
+    client = clients.get(key)
+    if client is None:
+        http_profile = HttpProfile(endpoint=TMT_ENDPOINT, reqTimeout=TMT_REQ_TIMEOUT, keepAlive=True)
+        client = clients[key] = tmt_client.TmtClient(
+            credential.Credential(secret_id, secret_key),
+            region,
+            ClientProfile(httpProfile=http_profile)
+        )
+    return client
+
+
+def translate_text(secret_id, secret_key, region, text, source="auto", target="zh", project_id=0):
+    """同步调用 TextTranslate，返回译文"""
+    req = models.TextTranslateRequest()
+    req.SourceText = text
+    req.Source = source
+    req.Target = target
+    req.ProjectId = project_id
+    return get_client(secret_id, secret_key, region).TextTranslate(req).TargetText
+
+
+def translate_batch(secret_id, secret_key, region, texts, source="auto", target="zh", project_id=0):
+    """同步调用 TextTranslateBatch，返回与 texts 一一对应的译文列表"""
+    req = models.TextTranslateBatchRequest()
+    req.SourceTextList = list(texts)
+    req.Source = source
+    req.Target = target
+    req.ProjectId = project_id
+    return list(get_client(secret_id, secret_key, region).TextTranslateBatch(req).TargetTextList)
+
+
+def truncate_utf8(text, max_bytes):
+    """按 UTF-8 字节数截断，不截断多字节字符"""
+    text_bytes = text.encode('utf-8')
+    if len(text_bytes) <= max_bytes:
+        return text
+    return text_bytes[:max_bytes].decode('utf-8', errors='ignore')
+
+
+def split_batches(texts, max_bytes=TMT_BATCH_MAX_BYTES):
+    """按总字节上限把 texts 切分成若干批，返回每批的下标列表"""
+    batches = []
+    current = []
+    current_bytes = 0
+    for index, text in enumerate(texts):
+        size = len(text.encode('utf-8'))
+        if current and current_bytes + size > max_bytes:
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(index)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def run_sync(func, *args, **kwargs):
+    """在翻译专用线程池中执行同步函数"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def translate_text_async(secret_id, secret_key, region, text, source="auto", target="zh", project_id=0):
+    return await run_sync(translate_text, secret_id, secret_key, region, text, source, target, project_id)
+
+
+async def translate_batch_async(secret_id, secret_key, region, texts, source="auto", target="zh", project_id=0):
+    return await run_sync(translate_batch, secret_id, secret_key, region, texts, source, target, project_id)